@@ -1,23 +1,37 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Union
 import logging
+import os
+import threading
+import numpy as np
 
 try:
     from config import Config
     from data_collector import StockDataCollector
-    from lstm_model import LSTMModelTrainer, CUSTOM_OBJECTS
+    from market_snapshot import MarketSnapshot
+    from lstm_model import LSTMModelTrainer
+    from model_registry import ModelRegistry
+    from forecast_store import ForecastStore
     from portfolio_recommender import PortfolioRecommender, CATEGORICAL_VOCAB
-    from evaluate import run_evaluation
+    from evaluate import run_evaluation, PredictionCache
+    from backtest import WalkForwardBacktester
+    from distillation import Distiller
 except ImportError:
     from MLmodel.config import Config
     from MLmodel.data_collector import StockDataCollector
-    from MLmodel.lstm_model import LSTMModelTrainer, CUSTOM_OBJECTS
+    from MLmodel.market_snapshot import MarketSnapshot
+    from MLmodel.lstm_model import LSTMModelTrainer
+    from MLmodel.model_registry import ModelRegistry
+    from MLmodel.forecast_store import ForecastStore
     from MLmodel.portfolio_recommender import PortfolioRecommender, CATEGORICAL_VOCAB
-    from MLmodel.evaluate import run_evaluation
+    from MLmodel.evaluate import run_evaluation, PredictionCache
+    from MLmodel.backtest import WalkForwardBacktester
+    from MLmodel.distillation import Distiller
 
 app    = FastAPI(title="InvestIQ ML API", version="1.0")
 logger = logging.getLogger("InvestIQML")
+training_lock = threading.Lock()   # one /train run at a time
 
 
 class PredictRequest(BaseModel):
@@ -25,6 +39,11 @@ class PredictRequest(BaseModel):
     days:   Optional[int] = None
 
 
+class BatchPredictRequest(BaseModel):
+    symbols: Union[List[str], str] = "all"
+    days:    Optional[int] = None
+
+
 class RecommendRequest(BaseModel):
     riskTolerance:        str
     investmentHorizon:    str
@@ -39,31 +58,80 @@ class RecommendRequest(BaseModel):
 
 @app.on_event("startup")
 def startup_event():
-    global config, collector, trainer, recommender
+    global config, collector, trainer, recommender, snapshot, registry, forecasts, eval_cache
     config      = Config()
     collector   = StockDataCollector(config)
     trainer     = LSTMModelTrainer(config)
     recommender = PortfolioRecommender(config)
+    registry    = ModelRegistry(trainer, config.model_cache_size)
+    forecasts   = ForecastStore(config.forecasts_db_path)
+    eval_cache  = PredictionCache()
+    snapshot    = MarketSnapshot(
+        collector, config.snapshot_ttl_seconds,
+        on_refresh=[_precompute_forecasts] if config.precompute_forecasts else None,
+    )
+    snapshot.start()
+    if config.preload_models:
+        registry.preload(config.selected_stocks)
     logger.info("InvestIQ ML API started.")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    snapshot.stop()
+
+
+def _precompute_forecasts(state):
+    forecasts.precompute(trainer, registry, state.stock_data, state.symbol_versions)
+
+
+def _missing_artifact(symbol):
+    """Error detail for a registry.get that raised FileNotFoundError: which artifact is missing."""
+    if not os.path.exists(trainer.model_path(symbol)):
+        return "Trained model not found for symbol"
+    return "Scaler not found — retrain the model first"
+
+
+def _data_info(state):
+    return {"dataVersion": state.version, "asOf": state.as_of}
+
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", **_data_info(snapshot.current())}
 
 
 @app.post("/train")
-def train_models():
-    stock_data = collector.fetch_all_stocks()
-    if not stock_data:
-        raise HTTPException(status_code=500, detail="No stock data fetched")
+def train_models(resume: bool = False):
+    if not training_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A training run is already in progress")
+    try:
+        # Training always works on freshly fetched data; the snapshot picks it up too
+        stock_data = snapshot.refresh().stock_data
+        if not stock_data:
+            raise HTTPException(status_code=500, detail="No stock data fetched")
 
-    models, metrics = trainer.train_all_models(stock_data)
+        # A trainer of its own, so the serving trainer's scalers are never rewritten under a
+        # request; the registry serves the models it holds until the run (and distillation)
+        # is done, then reloads every model and scaler together
+        features = collector.store.load_all(stock_data)
+        staging  = LSTMModelTrainer(config)
+        with registry.hold():
+            models, metrics = staging.train_all_models(features, resume=resume)
+            if config.distill_students:
+                # Students of retrained teachers are stale (no longer served) until re-distilled
+                Distiller(config).distill_all(features, models)
 
-    # train() with no user_profiles → loads from private DB automatically
-    recommender.train(stock_data)
+        # Snapshot refresh precomputed with the old models; redo it with the new ones
+        if config.precompute_forecasts:
+            _precompute_forecasts(snapshot.current())
 
-    return {"trained": list(models.keys()), "metrics": metrics}
+        # train() with no user_profiles → loads from private DB automatically
+        recommender.train(stock_data)
+
+        return {"trained": list(models.keys()), "metrics": metrics, "failed": staging.last_run.failed()}
+    finally:
+        training_lock.release()
 
 
 @app.post("/predict")
@@ -71,37 +139,102 @@ def predict(request: PredictRequest):
     symbol = request.symbol.upper()
     days   = request.days or config.prediction_days
 
-    stock_data = collector.fetch_all_stocks()
+    state      = snapshot.current()
+    stock_data = state.stock_data
     if symbol not in stock_data:
         raise HTTPException(status_code=404, detail=f"{symbol} data not available")
 
-    model_path = f"{config.models_dir}/{symbol}_lstm_model.keras"
+    # Precomputed forecast for this data + model version: a single key lookup
+    data_version = state.symbol_versions.get(symbol)
     try:
-        from tensorflow.keras.models import load_model
-        model = load_model(model_path, custom_objects=CUSTOM_OBJECTS)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Trained model not found for symbol")
+        model_version = registry.version(symbol)
+    except FileNotFoundError:
+        model_version = None
+    stored = forecasts.get(symbol, data_version, model_version) if model_version else None
+    if stored is not None:
+        return {
+            "symbol":      symbol,
+            "predictions": [round(float(p), 2) for p in stored[:days]],
+            "source":      "precomputed",
+            **_data_info(state),
+        }
 
+    # Miss — live inference on the warm registry model, written through for the next request
     try:
-        trainer.load_scaler(symbol)
+        model = registry.get(symbol)
     except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Scaler not found — retrain the model first")
+        raise HTTPException(status_code=500, detail=_missing_artifact(symbol))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Trained model not found for symbol")
 
-    df = stock_data[symbol]
-    X, y_scaled = trainer.prepare_data(df, symbol=symbol, fit_scaler=False)
-    if len(X) == 0:
+    last_sequence = trainer.prepare_last_window(stock_data[symbol], symbol)
+    if last_sequence is None:
         raise HTTPException(status_code=400, detail="Insufficient data for prediction")
 
-    last_sequence      = X[-1:]
-    pred_scaled        = model.predict(last_sequence, verbose=0)[0]
+    try:
+        pred_scaled = trainer.predict_scaled(model, symbol, last_sequence)[0]
+    except KeyError:
+        raise HTTPException(status_code=500, detail="Trained model not found for symbol")
     predictions_rupees = trainer.inverse_transform_close(symbol, pred_scaled)
+    if model_version and data_version:
+        forecasts.put(symbol, data_version, model_version,
+                      str(stock_data[symbol]["Date"].iloc[-1].date()), predictions_rupees)
 
     return {
         "symbol":      symbol,
         "predictions": [round(float(p), 2) for p in predictions_rupees[:days]],
+        "source":      "live",
+        **_data_info(state),
     }
 
 
+@app.post("/predict/batch")
+def predict_batch(request: BatchPredictRequest):
+    days = request.days or config.prediction_days
+    if isinstance(request.symbols, str):
+        if request.symbols.lower() != "all":
+            raise HTTPException(status_code=422, detail="symbols must be a list or \"all\"")
+        symbols = list(config.selected_stocks)
+    else:
+        symbols = list(dict.fromkeys(s.upper() for s in request.symbols))
+
+    state      = snapshot.current()
+    stock_data = state.stock_data
+
+    # Collect every window first so each model runs once for the whole batch
+    models, windows, errors = {}, {}, {}
+    for symbol in symbols:
+        if symbol not in stock_data:
+            errors[symbol] = f"{symbol} data not available"
+            continue
+        try:
+            models[symbol] = registry.get(symbol)
+        except FileNotFoundError:
+            errors[symbol] = _missing_artifact(symbol)
+            continue
+        except Exception:
+            errors[symbol] = "Trained model not found for symbol"
+            continue
+        window = trainer.prepare_last_window(stock_data[symbol], symbol)
+        if window is None:
+            errors[symbol] = "Insufficient data for prediction"
+            continue
+        windows[symbol] = window
+
+    predicted = trainer.predict_batch(models, windows)
+    for symbol in windows:
+        if symbol not in predicted:
+            errors[symbol] = "Trained model not found for symbol"
+
+    predictions = {}
+    if predicted:
+        ordered = list(predicted)
+        prices  = trainer.inverse_transform_close_many(ordered, np.stack([predicted[s] for s in ordered]))
+        predictions = {s: [round(float(p), 2) for p in row[:days]] for s, row in zip(ordered, prices)}
+
+    return {"predictions": predictions, "errors": errors, **_data_info(state)}
+
+
 @app.post("/recommend")
 def recommend(request: RecommendRequest):
     # Validate all categorical fields upfront with clear 422 errors
@@ -114,7 +247,8 @@ def recommend(request: RecommendRequest):
                 detail=f"Invalid value '{value}' for '{field}'. Must be one of: {valid_values}",
             )
 
-    stock_data = collector.fetch_all_stocks()
+    state      = snapshot.current()
+    stock_data = state.stock_data
     if not stock_data:
         raise HTTPException(status_code=500, detail="No stock data available")
 
@@ -135,10 +269,21 @@ def recommend(request: RecommendRequest):
         logger.exception("Unexpected error in /recommend")
         raise HTTPException(status_code=500, detail=str(e))
 
-    return result
+    return {**result, **_data_info(state)}
 
 
 @app.get("/evaluate")
 def evaluate():
-    report = run_evaluation(config)
-    return report
\ No newline at end of file
+    # Snapshot data + loaded models; unchanged (model, data) versions reuse cached predictions
+    state  = snapshot.current()
+    report = run_evaluation(config, stock_data=state.stock_data, data_versions=state.symbol_versions,
+                            trainer=trainer, registry=registry, cache=eval_cache)
+    return report
+
+
+@app.get("/backtest")
+def backtest():
+    # Walk-forward over the shared snapshot with the already-loaded models
+    state  = snapshot.current()
+    report = WalkForwardBacktester(config, trainer, registry).run(state.stock_data)
+    return {**report, **_data_info(state)}
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+backtest.py
+-----------
+Walk-forward backtest of the forecasting models over every horizon.
+
+    python backtest.py [--symbols TCS INFY ...] [--stride 1]
+
+Each symbol's held-out split (after train_ratio) is replayed as rolling
+forecast origins: every backtest_stride days the model forecasts all
+prediction_days horizons from the lookback window ending at that origin.
+The first prediction_days − 1 held-out origins are skipped, so no forecast
+target overlaps a training target. Forecasts come from one batched predict
+per model (a pooled model forecasts the whole universe in one call).
+
+Per horizon h = 1..prediction_days, in rupees:
+  mae, rmse, mape (%), directional_accuracy (sign of the move from the
+  origin's close), plus the same for two baselines computed from the
+  window itself:
+    random_walk : every horizon = close at the origin
+    drift       : origin close + h × mean daily change over the window
+and skill = 1 − mae / mae(random_walk).
+
+One JSON report per run (logs_dir/backtest_*.json): per-symbol and
+universe-wide (all origins of all symbols) per-horizon arrays.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from config import Config
+    from data_collector import StockDataCollector
+    from feature_engine import FEATURES
+    from lstm_model import LSTMModelTrainer
+    from model_registry import ModelRegistry
+except ImportError:
+    from MLmodel.config import Config
+    from MLmodel.data_collector import StockDataCollector
+    from MLmodel.feature_engine import FEATURES
+    from MLmodel.lstm_model import LSTMModelTrainer
+    from MLmodel.model_registry import ModelRegistry
+
+CLOSE_IDX = FEATURES.index('Close')
+
+
+def horizon_metrics(actual, predicted, last):
+    """
+    Per-horizon metrics of (origins, horizons) rupee forecasts → {metric:
+    (horizons,) array}. last: (origins,) close at each origin, the reference
+    of directional accuracy (None for forecasts without a direction).
+    """
+    error   = predicted - actual
+    metrics = {
+        'mae':  np.abs(error).mean(axis=0),
+        'rmse': np.sqrt(np.square(error).mean(axis=0)),
+        'mape': 100 * np.abs(error / actual).mean(axis=0),
+    }
+    if last is not None:
+        moved = np.sign(actual - last[:, np.newaxis])
+        metrics['directional_accuracy'] = (np.sign(predicted - last[:, np.newaxis]) == moved).mean(axis=0)
+    return metrics
+
+
+def baselines(first, last, horizons, lookback):
+    """Naive forecasts from each window's first and last close → {name: (origins, horizons)}."""
+    steps = np.arange(1, horizons + 1, dtype=np.float32)
+    drift = (last - first) / (lookback - 1)
+    return {
+        'random_walk': np.repeat(last[:, np.newaxis], horizons, axis=1),
+        'drift':       last[:, np.newaxis] + drift[:, np.newaxis] * steps,
+    }
+
+
+def _score(actual, predicted, first, last, lookback):
+    horizons = actual.shape[1]
+    naive    = baselines(first, last, horizons, lookback)
+    result   = {'origins': len(actual), 'model': horizon_metrics(actual, predicted, last)}
+    result['random_walk'] = horizon_metrics(actual, naive['random_walk'], None)
+    result['drift']       = horizon_metrics(actual, naive['drift'], last)
+    result['skill']       = 1 - result['model']['mae'] / result['random_walk']['mae']
+    return result
+
+
+def _jsonable(result):
+    """Arrays → lists rounded to 4 decimals, for a compact report."""
+    if isinstance(result, dict):
+        return {k: _jsonable(v) for k, v in result.items()}
+    if isinstance(result, np.ndarray):
+        return np.round(result.astype(np.float64), 4).tolist()
+    return result
+
+
+class WalkForwardBacktester:
+    def __init__(self, config, trainer=None, registry=None):
+        self.config   = config
+        self.trainer  = trainer or LSTMModelTrainer(config)
+        self.registry = registry or ModelRegistry(self.trainer, config.model_cache_size)
+        self.logger   = logging.getLogger(__name__)
+
+    def test_windows(self, df, symbol):
+        """Scaled (X, y) of symbol's walk-forward origins; empty when it has no test split."""
+        X, y  = self.trainer.prepare_data(df, symbol=symbol)
+        split = int(len(X) * self.config.train_ratio)
+        start = split + self.config.prediction_days - 1   # purge targets overlapping training
+        return X[start::self.config.backtest_stride], y[start::self.config.backtest_stride]
+
+    def forecast(self, models, windows):
+        """
+        {symbol: (origins, prediction_days) scaled forecasts}, one predict per
+        distinct model. Symbols a pooled model was not trained on are left out.
+        """
+        groups = {}
+        for symbol in windows:
+            groups.setdefault(id(models[symbol]), []).append(symbol)
+
+        forecasts = {}
+        batch     = self.config.backtest_batch_size
+        for symbols in groups.values():
+            model = self.trainer._inference_model(models[symbols[0]])
+            if len(model.inputs) == 2:
+                known   = self.trainer.pooled_symbols()
+                symbols = [s for s in symbols if s in known]
+                if not symbols:
+                    continue
+                X    = np.concatenate([windows[s] for s in symbols])
+                ids  = np.concatenate([np.full((len(windows[s]), 1), known.index(s), dtype=np.int32)
+                                       for s in symbols])
+                pred = model.predict([X, ids], batch_size=batch, verbose=0)
+            else:
+                X    = np.concatenate([windows[s] for s in symbols])
+                pred = model.predict(X, batch_size=batch, verbose=0)
+            bounds = np.cumsum([len(windows[s]) for s in symbols])[:-1]
+            forecasts.update(zip(symbols, np.split(np.asarray(pred), bounds)))
+        return forecasts
+
+    def run(self, stock_data, models=None):
+        """
+        Backtests every symbol of stock_data with a trained model; writes and
+        returns the report. models: {symbol: model} already in memory (e.g.
+        just trained); other symbols are loaded through the registry.
+        """
+        started = time.perf_counter()
+        models  = dict(models or {})
+        windows, targets = {}, {}
+        for symbol, df in stock_data.items():
+            if symbol not in models:
+                try:
+                    models[symbol] = self.registry.get(symbol)
+                except FileNotFoundError:
+                    continue
+            elif symbol not in self.trainer.scalers:
+                try:
+                    self.trainer.load_scaler(symbol)
+                except FileNotFoundError:
+                    continue
+            X, y = self.test_windows(df, symbol)
+            if len(X):
+                windows[symbol], targets[symbol] = X, y
+
+        forecasts = self.forecast(models, windows)
+
+        symbols, per_symbol, parts = list(forecasts), {}, {'actual': [], 'predicted': [], 'first': [], 'last': []}
+        for symbol in symbols:
+            X    = windows[symbol]
+            rows = [symbol] * len(X)
+            actual    = self.trainer.inverse_transform_close_many(rows, targets[symbol])
+            predicted = self.trainer.inverse_transform_close_many(rows, forecasts[symbol])
+            ends      = self.trainer.inverse_transform_close_many(rows, X[:, [0, -1], CLOSE_IDX])
+            per_symbol[symbol] = _score(actual, predicted, ends[:, 0], ends[:, 1], X.shape[1])
+            for key, value in zip(parts, (actual, predicted, ends[:, 0], ends[:, 1])):
+                parts[key].append(value)
+
+        report = {
+            'created':  datetime.now().isoformat(timespec="seconds"),
+            'horizons': self.config.prediction_days,
+            'stride':   self.config.backtest_stride,
+            'symbols':  _jsonable(per_symbol),
+        }
+        if symbols:
+            # Universe: every origin of every symbol, pooled (windows may differ in length per symbol)
+            lookbacks = np.concatenate([np.full(len(windows[s]), windows[s].shape[1]) for s in symbols])
+            report['universe'] = _jsonable(_score(
+                *(np.concatenate(parts[k]) for k in ('actual', 'predicted', 'first', 'last')), lookbacks
+            ))
+        report['seconds'] = round(time.perf_counter() - started, 3)
+
+        path = os.path.join(self.config.logs_dir, f"backtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, separators=(',', ':'))
+        self.logger.info("Backtested %d symbols in %.2fs; report written to %s",
+                         len(symbols), report['seconds'], path)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over all forecast horizons")
+    parser.add_argument("--symbols", nargs="*", help="symbols to backtest (default: all selected stocks)")
+    parser.add_argument("--stride", type=int, help="days between forecast origins")
+    args = parser.parse_args()
+
+    config = Config()
+    if args.symbols:
+        config.selected_stocks = [s.upper() for s in args.symbols]
+    if args.stride:
+        config.backtest_stride = args.stride
+    collector = StockDataCollector(config)
+    report    = WalkForwardBacktester(config).run(collector.fetch_all_stocks())
+    if 'universe' in report:
+        universe = report['universe']
+        print(f"{len(report['symbols'])} symbols, {universe['origins']} origins, {report['seconds']}s")
+        for h in (0, report['horizons'] // 2, report['horizons'] - 1):
+            print(f"  h={h + 1:>2}  MAPE {universe['model']['mape'][h]:6.2f}%  "
+                  f"(random walk {universe['random_walk']['mape'][h]:6.2f}%)  "
+                  f"direction {universe['model']['directional_accuracy'][h]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
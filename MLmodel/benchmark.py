@@ -0,0 +1,327 @@
+"""
+benchmark.py
+------------
+Offline performance benchmarks for the ML hot paths.
+
+    python benchmark.py [--suites hot_paths execution_modes scale] [--samples 512]
+                        [--repeats 3] [--scales 1 10 100]
+                        [--compare logs/benchmark_<previous>.json]
+
+Runs on deterministic synthetic fixtures (OHLCV bars from SyntheticProvider,
+windows and investor profiles — no network, no trained artifacts, nothing written to
+models_dir) and writes a JSON report, stamped with the git commit, to
+logs_dir. --compare prints the change in median latency against an
+earlier report.
+
+  - hot paths       : per operation, latency percentiles (p50/p95/p99 ms),
+                      throughput (items/s) and peak traced memory (Python
+                      and NumPy allocations, via tracemalloc) of
+                        compute_features, LSTMModelTrainer.prepare_data,
+                        build_model + one training epoch, single-window and
+                        batched predict, inverse_transform_close,
+                        PortfolioRecommender._encode / prepare_data / recommend
+  - scale           : the same pipeline stages over synthetic universes of
+                      --scales × 29 symbols (opt-in): bar generation,
+                      feature engineering (per-symbol frames and panel),
+                      window preparation, a training step (with the epoch
+                      time it implies for the whole universe), recommender
+                      training-set construction and recommend
+  - execution modes : training and inference throughput of build_model in
+                      float32, XLA (jit_compile), mixed_bfloat16 and
+                      XLA + mixed_bfloat16, with the speedup over float32.
+                      bfloat16 modes are skipped on CPUs without native
+                      bfloat16 support.
+"""
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from config import Config
+    from data_collector import StockDataCollector
+    from lstm_model import LSTMModelTrainer, NUM_FEATURES, cpu_supports_bfloat16
+    from data_providers import SyntheticProvider, synthetic_symbols, synthetic_sector_map
+    from portfolio_recommender import PortfolioRecommender, CATEGORICAL_VOCAB, ALL_SECTORS
+except ImportError:
+    from MLmodel.config import Config
+    from MLmodel.data_collector import StockDataCollector
+    from MLmodel.lstm_model import LSTMModelTrainer, NUM_FEATURES, cpu_supports_bfloat16
+    from MLmodel.data_providers import SyntheticProvider, synthetic_symbols, synthetic_sector_map
+    from MLmodel.portfolio_recommender import PortfolioRecommender, CATEGORICAL_VOCAB, ALL_SECTORS
+
+
+EXECUTION_MODES = {
+    'float32':  {'jit_compile': False, 'mixed_precision': None},
+    'xla':      {'jit_compile': True,  'mixed_precision': None},
+    'bf16':     {'jit_compile': False, 'mixed_precision': 'mixed_bfloat16'},
+    'xla+bf16': {'jit_compile': True,  'mixed_precision': 'mixed_bfloat16'},
+}
+
+
+def synthetic_windows(config, samples, seed=0):
+    """Random scaled (X, y) shaped like prepare_data output."""
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, config.lookback_window, NUM_FEATURES), dtype=np.float32)
+    y = rng.random((samples, config.prediction_days), dtype=np.float32)
+    return X, y
+
+
+def synthetic_universe(config, symbols):
+    """
+    (sector map, {symbol: raw OHLCV frame}) of an n-symbol SyntheticProvider
+    universe; pass the sector map to PortfolioRecommender.
+    """
+    sector_map = synthetic_sector_map(synthetic_symbols(symbols), config.synthetic_sectors)
+    provider   = SyntheticProvider(config, sector_map)
+    return sector_map, {s: provider.fetch(s) for s in provider.symbols}
+
+
+def synthetic_profiles(n, seed=0):
+    """n seeded investor profiles shaped like the synthetic_profiles table."""
+    rng  = np.random.default_rng(seed)
+    data = {col: rng.choice(vocab, n) for col, vocab in CATEGORICAL_VOCAB.items()}
+    data['sectors'] = [list(rng.choice(ALL_SECTORS, rng.integers(0, 4), replace=False)) for _ in range(n)]
+    data['investmentAmount'] = rng.uniform(10_000, 5_000_000, n).round(2)
+    data['age']              = rng.integers(21, 70, n)
+    data['currentIncome']    = rng.uniform(200_000, 5_000_000, n).round(2)
+    return pd.DataFrame(data)
+
+
+def measure(fn, repeats, items=1, warmup=1):
+    """
+    Latency percentiles (ms) and throughput (items per second) over repeats
+    timed calls after warmup, plus the peak traced memory of one extra call
+    (traced separately so tracemalloc overhead stays out of the timings).
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    ms = np.array(times) * 1000
+    return {
+        'repeats':        repeats,
+        'p50_ms':         float(np.percentile(ms, 50)),
+        'p95_ms':         float(np.percentile(ms, 95)),
+        'p99_ms':         float(np.percentile(ms, 99)),
+        'items_per_s':    items / float(np.median(times)),
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def _recorder(results, default_repeats):
+    def record(name, fn, items=1, n=default_repeats, warmup=1):
+        results[name] = {'items': items, **measure(fn, n, items, warmup)}
+        r = results[name]
+        print(f"{name:<28} p50 {r['p50_ms']:10.2f} ms  p95 {r['p95_ms']:10.2f} ms  "
+              f"{r['items_per_s']:12.1f} items/s  peak {r['peak_memory_kb']:10.1f} KB")
+    return record
+
+
+def bench_hot_paths(config, samples=512, repeats=3, profiles=200, symbols=29):
+    """{operation: measure()} for the hot paths of the pipeline, on synthetic fixtures."""
+    sectors, raw = synthetic_universe(config, symbols)
+    symbol   = next(iter(raw))
+    days     = len(raw[symbol])
+    trainer  = LSTMModelTrainer(config)
+    results  = {}
+    record   = _recorder(results, repeats)
+
+    # ── Features + windows ───────────────────────────────────
+    features = {s: StockDataCollector.compute_features(df) for s, df in raw.items()}
+    record('compute_features', lambda: StockDataCollector.compute_features(raw[symbol]), items=days)
+    X, y = trainer.prepare_data(features[symbol], symbol=symbol, fit_scaler=True)
+    record('prepare_data', lambda: trainer.prepare_data(features[symbol], symbol=symbol, fit_scaler=True),
+           items=len(X))
+
+    # ── Forecasting model ────────────────────────────────────
+    Xs, ys = synthetic_windows(config, samples)
+    batch  = config.batch_size
+    record('build_model+train_epoch',
+           lambda: trainer.build_model((config.lookback_window, NUM_FEATURES)).fit(
+               Xs, ys, batch_size=batch, epochs=1, verbose=0),
+           items=samples, n=max(1, repeats // 3), warmup=0)
+    model = trainer.build_model((config.lookback_window, NUM_FEATURES))
+    record('predict_single_window', lambda: model.predict_on_batch(Xs[:1]), n=max(repeats, 20))
+    record('predict_batch', lambda: model.predict(Xs, batch_size=batch, verbose=0), items=samples)
+    pred = model.predict_on_batch(Xs[:1])
+    record('inverse_transform_close', lambda: trainer.inverse_transform_close(symbol, pred),
+           n=max(repeats, 100))
+
+    # ── Recommender ──────────────────────────────────────────
+    recommender = PortfolioRecommender(config, sectors)
+    recommender._fit_encoders()
+    people = synthetic_profiles(profiles)
+    recommender.scaler.fit(people[["investmentAmount", "age", "currentIncome"]])
+    record('recommender_encode', lambda: recommender._encode(people), items=profiles)
+    record('recommender_prepare_data', lambda: recommender.prepare_data(features, people),
+           items=profiles * len(features), n=max(1, repeats // 3))
+    recommender.model = recommender.build_model(recommender._encode(people.head(1)).shape[1] + 2)
+    prefs = {**people.iloc[0].to_dict(), 'sectors': ["IT", "Finance"]}
+    record('recommend', lambda: recommender.recommend(prefs, features))
+
+    return results
+
+
+def bench_scale(config, scales=(1, 10), profiles=50, base_symbols=29):
+    """
+    {"<k>x": stage timings} for synthetic universes of k × base_symbols
+    symbols over config.synthetic_years. Every stage runs once after a warmup
+    (recommend, which predicts per symbol, without one).
+    """
+    config  = copy.copy(config)
+    config.data_period = "max"   # keep every synthetic year
+    trainer = LSTMModelTrainer(config)
+    model   = trainer.build_model((config.lookback_window, NUM_FEATURES))
+    Xb, yb  = synthetic_windows(config, config.batch_size)
+    people  = synthetic_profiles(profiles)
+    results = {}
+
+    for scale in scales:
+        n = scale * base_symbols
+        print(f"── {scale}x: {n} symbols × {config.synthetic_years} years")
+        stages = results[f"{scale}x"] = {'symbols': n}
+        record = _recorder(stages, 1)
+
+        sector_map, raw = synthetic_universe(config, n)
+        first = next(iter(raw))
+        stages['days'] = len(raw[first])
+        record('generate', lambda: SyntheticProvider(config, sector_map).fetch(first),
+               items=n * stages['days'])
+        record('compute_features', lambda: {s: StockDataCollector.compute_features(df)
+                                            for s, df in raw.items()}, items=n)
+        record('compute_features_panel', lambda: StockDataCollector.compute_features_panel(raw), items=n)
+
+        features = {s: StockDataCollector.compute_features(df) for s, df in raw.items()}
+        windows  = sum(len(trainer.prepare_data(df, symbol=s, fit_scaler=True)[0]) for s, df in features.items())
+        record('prepare_data', lambda: [trainer.prepare_data(df, symbol=s, fit_scaler=True)
+                                        for s, df in features.items()], items=windows)
+        record('train_step', lambda: model.train_on_batch(Xb, yb), items=config.batch_size)
+        steps = int(np.ceil(windows * config.train_ratio / config.batch_size))
+        stages['estimated_epoch_s'] = steps * stages['train_step']['p50_ms'] / 1000
+
+        recommender = PortfolioRecommender(config, sector_map)
+        recommender._fit_encoders()
+        recommender.scaler.fit(people[["investmentAmount", "age", "currentIncome"]])
+        record('recommender_prepare_data', lambda: recommender.prepare_data(features, people),
+               items=profiles * n)
+        recommender.model = recommender.build_model(recommender._encode(people.head(1)).shape[1] + 2)
+        prefs = {**people.iloc[0].to_dict(), 'sectors': ["IT", "Finance"]}
+        record('recommend', lambda: recommender.recommend(prefs, features), warmup=0)
+        print(f"  estimated training epoch over all {windows} windows: {stages['estimated_epoch_s']:.0f}s")
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, previous):
+    """Prints the change in p50 latency of every hot path against a previous report."""
+    before = previous.get('hot_paths', {})
+    print(f"Compared with {previous.get('commit')} ({previous.get('created')}):")
+    for name, r in report.get('hot_paths', {}).items():
+        if name in before:
+            change = 100 * (r['p50_ms'] / before[name]['p50_ms'] - 1)
+            print(f"  {name:<28} {before[name]['p50_ms']:10.2f} → {r['p50_ms']:10.2f} ms  ({change:+.1f}%)")
+
+
+def _best_of(repeats, fn):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_execution_modes(config, samples=512, repeats=3):
+    """{mode: train/predict samples per second and speedup over float32}."""
+    X, y    = synthetic_windows(config, samples)
+    batch   = config.batch_size
+    results = {}
+
+    for name, overrides in EXECUTION_MODES.items():
+        if overrides['mixed_precision'] and not cpu_supports_bfloat16():
+            results[name] = {'skipped': 'CPU has no native bfloat16'}
+            continue
+        mode_config = copy.copy(config)
+        vars(mode_config).update(overrides)
+        model = LSTMModelTrainer(mode_config).build_model((config.lookback_window, NUM_FEATURES))
+
+        # First epoch / predict pays for tracing and XLA compilation
+        model.fit(X, y, batch_size=batch, epochs=1, verbose=0)
+        model.predict(X, batch_size=batch, verbose=0)
+        train_s   = _best_of(repeats, lambda: model.fit(X, y, batch_size=batch, epochs=1, verbose=0))
+        predict_s = _best_of(repeats, lambda: model.predict(X, batch_size=batch, verbose=0))
+        results[name] = {
+            'train_samples_per_s':   samples / train_s,
+            'predict_samples_per_s': samples / predict_s,
+        }
+        print(f"{name:<9} train {results[name]['train_samples_per_s']:9.1f}/s   "
+              f"predict {results[name]['predict_samples_per_s']:9.1f}/s")
+
+    base = results['float32']
+    for r in results.values():
+        if 'skipped' not in r:
+            r['train_speedup']   = r['train_samples_per_s'] / base['train_samples_per_s']
+            r['predict_speedup'] = r['predict_samples_per_s'] / base['predict_samples_per_s']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InvestIQ offline benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=["hot_paths", "execution_modes", "scale"],
+                        default=["hot_paths", "execution_modes"])
+    parser.add_argument("--scales",   type=int, nargs="+", default=[1, 10],
+                        help="universe sizes of the scale suite, in multiples of 29 symbols")
+    parser.add_argument("--samples",  type=int, default=512, help="synthetic windows per run")
+    parser.add_argument("--repeats",  type=int, default=3,   help="timed runs per measurement")
+    parser.add_argument("--profiles", type=int, default=200, help="synthetic investor profiles")
+    parser.add_argument("--compare",  help="earlier benchmark report to compare against")
+    args = parser.parse_args()
+
+    config = Config()
+    report = {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'commit':  _git_commit(),
+    }
+    if "hot_paths" in args.suites:
+        report['hot_paths'] = bench_hot_paths(config, args.samples, args.repeats, args.profiles)
+    if "scale" in args.suites:
+        report['scale'] = bench_scale(config, args.scales, args.profiles)
+    if "execution_modes" in args.suites:
+        report['execution_modes'] = bench_execution_modes(config, args.samples, args.repeats)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    path = os.path.join(config.logs_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,22 @@ class Config:
         # ── Data ──────────────────────────────────────────────
         self.data_period       = "5y"
         self.train_ratio       = 0.8
+        self.use_raw_cache     = True    # keep OHLCV bars in raw_dir, fetch only new ones
+        self.raw_refresh_overlap = 5     # cached bars re-fetched on refresh to detect split/dividend re-adjustment
+        self.raw_adjust_tolerance = 1e-4  # relative Close change in the overlap that forces a full re-download
+        self.offline           = False   # serve from the raw cache only, never download
+        self.data_provider     = "yfinance"  # "yfinance" | "replay" | "synthetic"
+        self.fetch_workers     = 8       # concurrent symbol downloads
+        self.fetch_retries     = 3
+        self.fetch_min_interval = 0.2    # seconds between request starts (rate limit)
+        self.feature_rebase_days = 30    # incremental features run this far past data_period before a full recompute
+        self.feature_mode      = "frame"  # "frame" (per symbol, incremental) | "panel" (whole universe vectorized)
+        self.synthetic_years   = 5       # history generated by data_provider="synthetic" (see data_period)
+        self.synthetic_seed    = 0
+        self.synthetic_sectors = [       # assigned round-robin to synthetic symbols (recommender sectors)
+            "IT", "Finance", "Oil & Gas", "FMCG", "Pharma", "Auto",
+            "Metals", "Telecom", "Power", "Real Estate", "Textiles", "Chemicals",
+        ]
 
         # ── Sequence ──────────────────────────────────────────
         self.lookback_window   = 120
@@ -23,14 +39,42 @@ class Config:
         self.validation_split         = 0.2
         self.early_stopping_patience  = 20
         self.lr_patience              = 8
+        self.streaming_training       = False      # tf.data windows cut lazily from memory-mapped features
+        self.stream_dtype             = "float32"  # on-disk scaled features: "float32" | "float16"
+        self.shuffle_buffer           = 2048       # window start indices in the shuffle buffer
+        self.cnn_filters              = 32         # CNN branch widths: f, 2f, 4f
+        self.lstm_units               = 64         # BiLSTM branch units: u, u, u/2
+        self.dense_units              = 256        # dense head widths: d, d/2, d/4, d/8
+        self.training_mode            = "per_symbol"  # "per_symbol" | "pooled" (one model, symbol embeddings)
+        self.symbol_embedding_dim     = 8
+        self.search_trials            = 9          # hparam_search: configurations sampled per symbol
+        self.search_min_epochs        = 3          # epochs of the first successive-halving rung
+        self.search_eta               = 3          # keep the best 1/eta per rung, eta x epochs for the next
+        self.search_workers           = 1          # trials of a rung run in this many worker processes
+        self.epoch_checkpoints        = True       # per-epoch BackupAndRestore checkpoints (resumable fits)
+        self.training_workers         = 1          # >1: per-symbol training in parallel worker processes
+        self.intra_op_threads         = 0          # TF threads per worker (0 = the worker's core block)
+        self.inter_op_threads         = 1
+        self.export_tflite            = False      # also write float16 / int8 .tflite variants after training
+        self.tflite_parity_windows    = 16         # windows compared Keras vs TFLite after export
+        self.jit_compile              = False      # XLA-compile the train step and inference
+        self.mixed_precision          = None       # "mixed_bfloat16" on CPUs with native bfloat16
+        self.incremental_training     = False      # fine-tune saved models on recent data instead of retraining
+        self.finetune_epochs          = 3
+        self.finetune_window_days     = 250        # most recent training-split windows used for fine-tuning
+        self.full_retrain_days        = 30         # full retrain once the last one is this old
+        self.finetune_max_degradation = 0.10       # full retrain if fine-tuning raises held-out val_loss by >10%
+        self.distill_students         = False      # main.py: distill a compact student from every trained model
+        self.student_arch             = "gru"      # "gru" (one GRU layer) | "tcn" (dilated causal convs)
+        self.student_units            = 32
+        self.student_window           = 60         # most recent steps of the window the student reads (0 = all)
+        self.distill_alpha            = 1.0        # student target: alpha·teacher + (1 − alpha)·actual
+        self.evaluation_workers       = 4          # symbols evaluated concurrently (threads)
+        self.backtest_stride          = 1          # days between walk-forward forecast origins
+        self.backtest_batch_size      = 1024       # windows per predict batch in the backtest
 
         # ── Paths ─────────────────────────────────────────────
-        self.data_dir      = os.path.abspath("data")
-        self.raw_dir       = os.path.join(self.data_dir, "raw")
-        self.processed_dir = os.path.join(self.data_dir, "processed")
-        self.models_dir    = os.path.abspath("models")
-        self.scalers_dir   = os.path.abspath("scalers")
-        self.logs_dir      = os.path.abspath("logs")
+        self.set_paths()
 
         # ── Recommender ───────────────────────────────────────
         self.recommender_epochs     = 40
@@ -46,7 +90,32 @@ class Config:
         # ── API ───────────────────────────────────────────────
         self.api_host = "0.0.0.0"
         self.api_port = 8000
+        self.snapshot_ttl_seconds = 900   # background refresh of the shared market data (0 = never)
+        self.model_cache_size     = 32    # trained models kept loaded in memory (LRU)
+        self.preload_models       = True  # load every trained model at startup
+        self.precompute_forecasts = True  # forecast every symbol after each snapshot refresh
+        self.serving_runtime      = "keras"    # "keras" | "tflite" (needs export_tflite models)
+        self.tflite_variant       = "float16"  # exported variant served when serving_runtime="tflite"
+        self.serving_model        = "teacher"  # "teacher" | "student" (distilled, where available)
+
+    def set_paths(self):
+        """
+        Data, model, scaler and log paths. data_provider="synthetic" gets its own
+        tree (data/synthetic/, models/synthetic/, ...) so synthetic and real bars,
+        features, models and scalers never mix. Call again after changing
+        data_provider in code.
+        """
+        tree = ["synthetic"] if self.data_provider == "synthetic" else []
+        self.data_dir      = os.path.join(os.path.abspath("data"), *tree)
+        self.raw_dir       = os.path.join(self.data_dir, "raw")
+        self.processed_dir = os.path.join(self.data_dir, "processed")
+        self.replay_dir    = os.path.abspath(os.path.join("data", "replay"))   # {SYMBOL}.csv/.parquet for data_provider="replay"
+        self.scaled_dir    = os.path.join(self.data_dir, "scaled")   # scaled features for streaming_training
+        self.models_dir    = os.path.join(os.path.abspath("models"), *tree)
+        self.scalers_dir   = os.path.join(os.path.abspath("scalers"), *tree)
+        self.logs_dir      = os.path.join(os.path.abspath("logs"), *tree)
+        self.forecasts_db_path = os.path.join(self.data_dir, "forecasts.db")   # precomputed /predict answers
 
-        for d in [self.data_dir, self.raw_dir, self.processed_dir,
+        for d in [self.data_dir, self.raw_dir, self.processed_dir, self.scaled_dir,
                   self.models_dir, self.scalers_dir, self.logs_dir]:
-            os.makedirs(d, exist_ok=True)
\ No newline at end of file
+            os.makedirs(d, exist_ok=True)
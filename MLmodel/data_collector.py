@@ -1,14 +1,28 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    from data_providers import RAW_COLUMNS, make_provider
+    from feature_engine import IncrementalFeatureEngine, compute_panel
+    from feature_store import FeatureStore
+except ImportError:
+    from MLmodel.data_providers import RAW_COLUMNS, make_provider
+    from MLmodel.feature_engine import IncrementalFeatureEngine, compute_panel
+    from MLmodel.feature_store import FeatureStore
+
 
 class StockDataCollector:
-    def __init__(self, config):
-        self.config = config
-        self.logger = logging.getLogger(__name__)
+    def __init__(self, config, provider=None):
+        """provider=None → the source named by config.data_provider."""
+        self.config   = config
+        self.provider = provider or make_provider(config)
+        self.store    = FeatureStore(config)
+        self.logger   = logging.getLogger(__name__)
+        # symbol → {'bars': served raw frame, 'engine': IncrementalFeatureEngine, 'features': df}
+        self._feature_state = {}
 
     @staticmethod
     def compute_features(df):
@@ -65,38 +79,190 @@ class StockDataCollector:
         return df
 
     @staticmethod
-    def _flatten_columns(df):
+    def compute_features_panel(frames):
         """
-        yfinance sometimes returns a MultiIndex column like ('Close', 'RELIANCE.NS').
-        Flatten to single-level strings so df['Close'] always returns a Series.
+        Panel mode of compute_features for {symbol: raw OHLCV frame}: all symbols
+        on a shared trading calendar in one (symbols × days × fields) float32
+        array, every indicator computed in a single vectorized pass.
+        Returns a FeaturePanel; panel.frame(symbol) gives the per-symbol frame.
         """
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = [col[0] for col in df.columns]
-        # Ensure every OHLCV column is a plain 1-D Series (squeeze out extra dims)
-        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-            if col in df.columns and isinstance(df[col], pd.DataFrame):
-                df[col] = df[col].squeeze()
-        return df
+        return compute_panel(frames)
+
+    # ─────────────────────────────────────────────────────────
+    # RAW BAR CACHE
+    # ─────────────────────────────────────────────────────────
+    def _raw_path(self, symbol):
+        return Path(self.config.raw_dir) / f"{symbol}.csv"
+
+    def load_raw(self, symbol):
+        """Returns the cached OHLCV bars for symbol (sorted by Date), or None."""
+        path = self._raw_path(symbol)
+        if not path.exists():
+            return None
+        df = pd.read_csv(path, parse_dates=['Date'])
+        return df if not df.empty else None
+
+    def save_raw(self, symbol, df):
+        df[RAW_COLUMNS].to_csv(self._raw_path(symbol), index=False)
+
+    @staticmethod
+    def _merge_bars(cached, new):
+        """Appends new bars to cached ones; a re-downloaded date replaces the stored bar."""
+        merged = pd.concat([cached, new], ignore_index=True)
+        merged = merged.drop_duplicates(subset='Date', keep='last')
+        return merged.sort_values('Date').reset_index(drop=True)
+
+    def _period_start(self, end):
+        """First date covered by config.data_period ("5y", "6mo", "30d"), or None for "max"."""
+        period = str(self.config.data_period)
+        for suffix, unit in (('mo', 'months'), ('y', 'years'), ('d', 'days')):
+            if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+                return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+        return None
+
+    def _readjusted(self, cached, new):
+        """
+        True when the re-fetched overlap disagrees with the cached closes: the
+        provider's adjusted history was rebased (split or dividend) after the
+        cache was written, so new bars would not line up with the cached ones.
+        """
+        overlap = cached.merge(new, on='Date', suffixes=('_cached', ''))[['Close_cached', 'Close']]
+        if overlap.empty:
+            return False
+        change = (overlap['Close'] / overlap['Close_cached'] - 1).abs()
+        return bool((change > self.config.raw_adjust_tolerance).any())
+
+    def refresh_raw(self, symbol):
+        """
+        Returns the raw OHLCV history for symbol.
+        With use_raw_cache, only the last raw_refresh_overlap cached bars and
+        anything after them are downloaded and merged into raw_dir/{symbol}.csv;
+        everything else is read from disk. Prices are split/dividend adjusted,
+        so when the re-fetched overlap no longer matches the cache the full
+        history is downloaded again. A failed or empty refresh falls back to
+        the cached bars. Generated (synthetic) bars are never cached: a changed
+        seed or universe must not be answered with stale bars.
+        """
+        use_cache = self.config.use_raw_cache and not self.provider.generated
+        cached    = self.load_raw(symbol) if use_cache else None
+
+        if cached is None:
+            if self.config.offline and not self.provider.generated:
+                self.logger.warning(f"No cached bars for {symbol} (offline mode)")
+                return None
+            bars = self.provider.fetch(symbol)
+            if bars is None:
+                self.logger.warning(f"No data for {symbol}.NS")
+                return None
+        else:
+            bars    = cached
+            overlap = max(1, self.config.raw_refresh_overlap)
+            stale   = cached['Date'].max() + pd.Timedelta(days=1) <= pd.Timestamp.today().normalize()
+            if not self.config.offline and stale:
+                try:
+                    new = self.provider.fetch(symbol, start=cached['Date'].iloc[-overlap:].min())
+                    if new is not None and self._readjusted(cached, new):
+                        self.logger.info(f"Adjusted history of {symbol} changed, re-downloading it")
+                        new = self.provider.fetch(symbol)
+                        if new is not None:
+                            # Replaces the cache outright; features must be recomputed from scratch
+                            self._feature_state.pop(symbol, None)
+                            bars, new = new, None
+                except Exception as ex:
+                    self.logger.warning(f"Refresh failed for {symbol}, using cached bars: {ex}")
+                    new = None
+                if new is not None:
+                    bars = self._merge_bars(cached, new)
+
+        if use_cache and bars is not cached:
+            self.save_raw(symbol, bars)
+        return bars
+
+    def _trim_to_period(self, bars):
+        period_start = self._period_start(bars['Date'].max())
+        if period_start is None:
+            return bars
+        return bars[bars['Date'] >= period_start].reset_index(drop=True)
+
+    # ─────────────────────────────────────────────────────────
+    # FEATURES
+    # ─────────────────────────────────────────────────────────
+    def _extend_features(self, symbol, bars):
+        """
+        Appends feature rows for bars newer than the last computed frame using
+        the symbol's IncrementalFeatureEngine. Returns None when a full
+        compute_features pass is needed: nothing computed yet, or the frame has
+        outgrown data_period by more than feature_rebase_days. Between rebases
+        the frame keeps its start date, so the result equals compute_features
+        over the same bars.
+        """
+        state = self._feature_state.get(symbol)
+        if state is None:
+            return None
+
+        engine = state['engine']
+        if engine is None:
+            # Seeded on first use so a cold fetch pays only for compute_features
+            engine = IncrementalFeatureEngine.from_frame(state['bars'])
+            state.update(engine=engine, bars=None)
+
+        period_start = self._period_start(bars['Date'].max())
+        rebase_after = pd.Timedelta(days=self.config.feature_rebase_days)
+        if period_start is not None and engine.first_date < period_start - rebase_after:
+            return None
+
+        rows, labels = [], []
+        new = bars.loc[bars['Date'] > engine.last_date, RAW_COLUMNS]
+        for bar in new.itertuples(index=False):
+            row = engine.update(*bar)
+            if row is not None:
+                rows.append(row)
+                labels.append(engine.n - 1)   # row label = position in the served frame
+        if rows:
+            state['features'] = pd.concat([state['features'], pd.DataFrame(rows, index=labels)])
+        return state['features']
 
     def fetch_stock_data(self, symbol):
-        ticker = f"{symbol}.NS"
-        self.logger.info(f"Fetching {ticker}...")
-        df = yf.download(ticker, period=self.config.data_period,
-                         progress=False, threads=False, auto_adjust=True)
-        if df.empty:
-            self.logger.warning(f"No data for {ticker}")
+        bars = self.refresh_raw(symbol)
+        if bars is None:
             return None
-        df = df.reset_index()
-        df = self._flatten_columns(df)   # ← fix MultiIndex before feature engineering
-        df = self.compute_features(df)
+        df = self._extend_features(symbol, bars)
+        if df is None:
+            bars = self._trim_to_period(bars)
+            df   = self.compute_features(bars)
+            self._feature_state[symbol] = {'bars': bars, 'engine': None, 'features': df}
         return df
 
+    def _fetch_or_none(self, symbol, raw_only=False):
+        try:
+            if raw_only:
+                bars = self.refresh_raw(symbol)
+                return self._trim_to_period(bars) if bars is not None else None
+            return self.fetch_stock_data(symbol)
+        except Exception as ex:
+            self.logger.warning(f"Fetching {symbol} failed: {ex}")
+            return None
+
     def fetch_all_stocks(self):
+        # Symbols are fetched concurrently (bounded by fetch_workers), so a cold
+        # start takes about as long as the slowest symbol rather than the sum.
+        symbols  = list(self.config.selected_stocks)
+        workers  = max(1, min(self.config.fetch_workers, len(symbols)))
+        panel    = self.config.feature_mode == "panel"
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = pool.map(lambda s: self._fetch_or_none(s, raw_only=panel), symbols)
+            frames  = dict(zip(symbols, fetched))
+
+        if panel:
+            raw = {s: bars for s, bars in frames.items() if bars is not None}
+            feature_panel = self.compute_features_panel(raw) if raw else None
+            frames = {s: feature_panel.frame(s) if s in raw else None for s in symbols}
+
         results = {}
-        for symbol in self.config.selected_stocks:
-            df = self.fetch_stock_data(symbol)
+        for symbol in symbols:
+            df = frames[symbol]
             if df is not None and len(df) > self.config.lookback_window + 10:
                 results[symbol] = df
-                processed_path = Path(self.config.processed_dir) / f"{symbol}.csv"
-                df.to_csv(processed_path, index=False)
-        return results
\ No newline at end of file
+        # Only symbols whose features changed since the last fetch are rewritten
+        self.store.write_all(results)
+        return results
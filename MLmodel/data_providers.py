@@ -0,0 +1,249 @@
+"""
+data_providers.py
+-----------------
+Sources of raw daily OHLCV bars for StockDataCollector.
+
+Every provider returns a DataFrame with RAW_COLUMNS (tz-naive Date, sorted
+ascending) or None when it has no bars for the symbol:
+
+  - YFinanceProvider : Yahoo Finance ({SYMBOL}.NS), rate limited with retries,
+                       safe to call from several threads at once.
+  - ReplayProvider   : reads {SYMBOL}.csv / {SYMBOL}.parquet from a local
+                       directory — for air-gapped and test environments.
+  - SyntheticProvider: seeded, correlated regime-switching market for load
+                       and scale tests — any number of symbols and years.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+
+RAW_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _normalise_bars(df):
+    """Flat RAW_COLUMNS frame with a tz-naive Date column, sorted by Date."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] for col in df.columns]
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: 'Date'})
+    df['Date'] = pd.to_datetime(df['Date'])
+    if df['Date'].dt.tz is not None:
+        df['Date'] = df['Date'].dt.tz_localize(None)
+    df = df[RAW_COLUMNS].dropna(subset=['Close'])
+    return df.sort_values('Date').reset_index(drop=True)
+
+
+class DataProvider(ABC):
+    """Interface: fetch(symbol, start=None) → raw OHLCV bars or None."""
+
+    # True for providers that generate their bars on demand: no network is
+    # involved, so they also work offline and bypass the raw bar cache.
+    generated = False
+
+    @abstractmethod
+    def fetch(self, symbol, start=None):
+        """
+        start=None → the full config.data_period history
+        start=Timestamp → only bars dated on or after start
+        """
+
+
+class YFinanceProvider(DataProvider):
+    # Ticker.history reports most failures (throttling, network errors) as an
+    # empty frame rather than an exception. An empty answer is retried when
+    # bars were expected: a full history, or a refresh starting this long ago.
+    EXPECT_BARS_AFTER = pd.Timedelta(days=7)
+
+    def __init__(self, config):
+        self.period       = config.data_period
+        self.retries      = config.fetch_retries
+        self.min_interval = config.fetch_min_interval
+        self.logger       = logging.getLogger(__name__)
+        self._lock        = threading.Lock()
+        self._next_slot   = 0.0
+
+    def _wait_for_slot(self):
+        """Spaces request starts at least min_interval apart across all threads."""
+        with self._lock:
+            now  = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def fetch(self, symbol, start=None):
+        # Ticker.history keeps no module-level state, unlike yf.download,
+        # so concurrent calls for different symbols do not interfere.
+        ticker   = f"{symbol}.NS"
+        kwargs   = {'period': self.period} if start is None else {'start': start.strftime('%Y-%m-%d')}
+        expected = start is None or start <= pd.Timestamp.today().normalize() - self.EXPECT_BARS_AFTER
+        df = None
+        for attempt in range(self.retries + 1):
+            self._wait_for_slot()
+            try:
+                df = yf.Ticker(ticker).history(auto_adjust=True, **kwargs)
+            except Exception as ex:
+                if attempt == self.retries:
+                    raise
+                reason = ex
+            else:
+                if not expected or (df is not None and not df.empty) or attempt == self.retries:
+                    break
+                reason = "empty response"
+            delay = 2 ** attempt
+            self.logger.warning(f"Fetch {ticker} failed ({reason}), retrying in {delay}s")
+            time.sleep(delay)
+        if df is None or df.empty:
+            return None
+        return _normalise_bars(df)
+
+
+class ReplayProvider(DataProvider):
+    def __init__(self, replay_dir):
+        self.replay_dir = Path(replay_dir)
+        self.logger     = logging.getLogger(__name__)
+
+    def fetch(self, symbol, start=None):
+        parquet_path = self.replay_dir / f"{symbol}.parquet"
+        csv_path     = self.replay_dir / f"{symbol}.csv"
+        if parquet_path.exists():
+            df = pd.read_parquet(parquet_path)
+        elif csv_path.exists():
+            df = pd.read_csv(csv_path)
+        else:
+            self.logger.warning(f"No replay file for {symbol} in {self.replay_dir}")
+            return None
+        df = _normalise_bars(df)
+        if start is not None:
+            df = df[df['Date'] >= start].reset_index(drop=True)
+        return df if not df.empty else None
+
+
+def synthetic_symbols(n):
+    """Names of an n-symbol synthetic universe: SYN00000, SYN00001, ..."""
+    return [f"SYN{i:05d}" for i in range(n)]
+
+
+def synthetic_sector_map(symbols, sectors):
+    """Sector of each symbol, assigned round-robin from sectors."""
+    return {symbol: sectors[i % len(sectors)] for i, symbol in enumerate(symbols)}
+
+
+class SyntheticProvider(DataProvider):
+    """
+    Daily bars of a synthetic market, generated jointly for the whole
+    universe so that symbols are correlated:
+
+        return[s, t] = beta_s · market_t + gamma_s · sector_{k(s), t} + idio_s · noise
+
+    The market factor follows a two-state Markov regime (calm: small positive
+    drift and low volatility; turbulent: negative drift, ~3x volatility) that
+    also scales the sector and idiosyncratic shocks. Opens gap from the
+    previous close, highs/lows bracket the open-close range, and volume rises
+    with the size of the move.
+
+    Everything is drawn from one generator seeded with config.synthetic_seed,
+    over config.synthetic_years × 252 business days ending on END_DATE, so the
+    same config always yields the same bars. The universe (and its sectors)
+    is sector_map, by default config.selected_stocks assigned round-robin to
+    config.synthetic_sectors. The whole panel is generated on the first fetch.
+    """
+
+    generated = True
+    END_DATE  = pd.Timestamp("2024-12-31")
+    REGIMES   = {           # drift, volatility, probability of staying
+        'calm':      (0.0006, 0.008, 0.985),
+        'turbulent': (-0.0010, 0.024, 0.950),
+    }
+
+    def __init__(self, config, sector_map=None):
+        self.sector_map = dict(sector_map) if sector_map else synthetic_sector_map(
+            config.selected_stocks, config.synthetic_sectors)
+        self.years  = config.synthetic_years
+        self.seed   = config.synthetic_seed
+        self.logger = logging.getLogger(__name__)
+        self._lock  = threading.Lock()
+        self._panel = None   # (dates, {field: (symbols, days) array}, symbol → row)
+
+    @property
+    def symbols(self):
+        return list(self.sector_map)
+
+    def _regimes(self, rng, days):
+        """(days,) bool — True on turbulent days."""
+        stay   = {False: self.REGIMES['calm'][2], True: self.REGIMES['turbulent'][2]}
+        draws  = rng.random(days)
+        path   = np.empty(days, dtype=bool)
+        state  = False
+        for t in range(days):
+            if draws[t] > stay[state]:
+                state = not state
+            path[t] = state
+        return path
+
+    def _generate(self):
+        rng     = np.random.default_rng(self.seed)
+        symbols = self.symbols
+        n, days = len(symbols), int(self.years * 252)
+        sectors = sorted(set(self.sector_map.values()))
+        sector  = np.array([sectors.index(self.sector_map[s]) for s in symbols])
+
+        turbulent = self._regimes(rng, days)
+        drift     = np.where(turbulent, self.REGIMES['turbulent'][0], self.REGIMES['calm'][0])
+        vol       = np.where(turbulent, self.REGIMES['turbulent'][1], self.REGIMES['calm'][1])
+        shock     = vol / self.REGIMES['calm'][1]   # regime scale of sector / idiosyncratic noise
+
+        market   = drift + vol * rng.standard_normal(days)
+        factors  = 0.007 * shock * rng.standard_normal((len(sectors), days))
+        beta     = rng.uniform(0.6, 1.4, n)[:, np.newaxis]
+        gamma    = rng.uniform(0.5, 1.0, n)[:, np.newaxis]
+        idio     = rng.uniform(0.006, 0.018, n)[:, np.newaxis]
+        returns  = beta * market + gamma * factors[sector] + idio * shock * rng.standard_normal((n, days))
+
+        start = rng.lognormal(np.log(500), 1.0, n)[:, np.newaxis]
+        close = start * np.exp(np.cumsum(returns, axis=1))
+        prev  = np.concatenate([start, close[:, :-1]], axis=1)
+        scale = np.abs(returns) + idio
+        open_ = prev * np.exp(0.3 * scale * rng.standard_normal((n, days)))
+        high  = np.maximum(open_, close) * (1 + 0.5 * scale * np.abs(rng.standard_normal((n, days))))
+        low   = np.minimum(open_, close) * (1 - 0.5 * scale * np.abs(rng.standard_normal((n, days))))
+        base  = rng.lognormal(np.log(2e6), 0.8, n)[:, np.newaxis]
+        volume = np.round(base * np.exp(0.3 * rng.standard_normal((n, days))) * (1 + 20 * np.abs(returns)))
+
+        dates  = pd.bdate_range(end=self.END_DATE, periods=days)
+        fields = {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+        return dates, fields, {s: i for i, s in enumerate(symbols)}
+
+    def fetch(self, symbol, start=None):
+        with self._lock:
+            if self._panel is None:
+                self._panel = self._generate()
+        dates, fields, rows = self._panel
+        if symbol not in rows:
+            self.logger.warning(f"{symbol} is not part of the synthetic universe")
+            return None
+        row = rows[symbol]
+        df  = pd.DataFrame({'Date': dates, **{k: v[row] for k, v in fields.items()}})
+        if start is not None:
+            df = df[df['Date'] >= start].reset_index(drop=True)
+        return df if not df.empty else None
+
+
+def make_provider(config):
+    """Builds the provider named by config.data_provider."""
+    if config.data_provider == "yfinance":
+        return YFinanceProvider(config)
+    if config.data_provider == "replay":
+        return ReplayProvider(config.replay_dir)
+    if config.data_provider == "synthetic":
+        return SyntheticProvider(config)
+    raise ValueError(f"Unknown data_provider: {config.data_provider!r}")
@@ -0,0 +1,209 @@
+"""
+distillation.py
+---------------
+Distils each symbol's forecasting model (the teacher) into a compact
+student for low-latency serving.
+
+    python distillation.py [--symbols TCS INFY ...]
+
+The student (LSTMModelTrainer.build_student_model: one GRU layer or a small
+temporal conv net over the last student_window steps of the same input
+windows) is trained on the teacher's forecasts for the training windows,
+blended with the actual prices by distill_alpha, and validated against the
+actual prices of the held-out split. It is saved as
+{models_dir}/{SYMBOL}_student.keras (plus TFLite variants with
+export_tflite) and served instead of the teacher with serving_model="student".
+Its sidecar records the teacher artifact and scaler it was distilled from: the
+student works in that scaler's space, so once the teacher is retrained or
+fine-tuned the teacher is served again until the student is re-distilled.
+
+The JSON report in logs_dir compares teacher and student per symbol on the
+held-out windows:
+  - accuracy : MAE / RMSE in rupees over all horizons, the student's change
+               in MAE, and its MAE against the teacher's own forecasts
+  - latency  : single-window predict_on_batch (median ms) and batch
+               throughput (windows/s)
+  - memory   : parameter count and artifact size on disk
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from config import Config
+    from data_collector import StockDataCollector
+    from lstm_model import LSTMModelTrainer, custom_objects
+except ImportError:
+    from MLmodel.config import Config
+    from MLmodel.data_collector import StockDataCollector
+    from MLmodel.lstm_model import LSTMModelTrainer, custom_objects
+
+
+def _model_inputs(trainer, model, symbol, X):
+    """X, or [X, symbol ids] for a pooled teacher."""
+    if len(model.inputs) == 2:
+        ids = np.full((len(X), 1), trainer.pooled_symbols().index(symbol), dtype=np.int32)
+        return [X, ids]
+    return X
+
+
+def _latency_ms(model, inputs, repeats):
+    """Median wall time of one predict_on_batch call, in milliseconds."""
+    model.predict_on_batch(inputs)   # first call traces the predict step
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_on_batch(inputs)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def _accuracy(actual, predicted):
+    error = predicted - actual
+    return {
+        'mae':  float(np.abs(error).mean()),
+        'rmse': float(np.sqrt((error ** 2).mean())),
+    }
+
+
+class Distiller:
+    def __init__(self, config, repeats=20):
+        self.config  = config
+        self.trainer = LSTMModelTrainer(config)
+        self.logger  = logging.getLogger(__name__)
+        self.repeats = repeats
+
+    def _cost(self, trainer, model, path, symbol, X_val):
+        """Latency and memory figures of model on the held-out windows."""
+        single = _model_inputs(trainer, model, symbol, X_val[-1:])
+        batch  = _model_inputs(trainer, model, symbol, X_val)
+        model.predict_on_batch(batch)
+        start = time.perf_counter()
+        model.predict_on_batch(batch)
+        throughput = len(X_val) / (time.perf_counter() - start)
+        return {
+            'latency_ms':     _latency_ms(model, single, self.repeats),
+            'windows_per_s':  throughput,
+            'params':         int(model.count_params()),
+            'artifact_bytes': os.path.getsize(path),
+        }
+
+    def distill(self, symbol, df, teacher):
+        """Trains and saves symbol's student → report entry; None if there are too few windows."""
+        trainer = self.trainer.for_symbol(symbol)
+        trainer.load_scaler(symbol)
+        X, y  = trainer.prepare_data(df, symbol=symbol)
+        split = int(len(X) * trainer.config.train_ratio)
+        if split < 50 or split == len(X):
+            print(f"[{symbol}] Not enough sequences ({len(X)}) to distill, skipping.")
+            return None
+
+        soft   = trainer.predict_scaled(teacher, symbol, X)
+        alpha  = trainer.config.distill_alpha
+        target = alpha * soft[:split] + (1 - alpha) * y[:split]
+
+        student = trainer.build_student_model(input_shape=(X.shape[1], X.shape[2]))
+        student.fit(
+            X[:split], target,
+            validation_data=(X[split:], y[split:]),
+            batch_size=trainer.config.batch_size,
+            epochs=trainer.config.epochs,
+            callbacks=trainer._callbacks(),
+            verbose=0
+        )
+        path = trainer.student_path(symbol)
+        student.save(path)
+        trainer.write_provenance(path, trainer.model_path(symbol), [symbol])
+        if trainer.config.export_tflite:
+            trainer._export_tflite_checked(student, path, [symbol], X[-trainer.config.tflite_parity_windows:])
+
+        X_val  = X[split:]
+        rows   = [symbol] * len(X_val)
+        actual = trainer.inverse_transform_close_many(rows, y[split:])
+        t_pred = trainer.inverse_transform_close_many(rows, soft[split:])
+        s_pred = trainer.inverse_transform_close_many(rows, student.predict(X_val, verbose=0))
+
+        t_entry = {**_accuracy(actual, t_pred),
+                   **self._cost(trainer, teacher, trainer.model_path(symbol), symbol, X_val)}
+        s_entry = {**_accuracy(actual, s_pred),
+                   'mae_vs_teacher': _accuracy(t_pred, s_pred)['mae'],
+                   **self._cost(trainer, student, path, symbol, X_val)}
+        entry = {
+            'teacher':         t_entry,
+            'student':         s_entry,
+            'mae_change_pct':  100 * (s_entry['mae'] / t_entry['mae'] - 1),
+            'latency_speedup': t_entry['latency_ms'] / s_entry['latency_ms'],
+            'param_reduction': t_entry['params'] / s_entry['params'],
+        }
+        print(f"[{symbol}] MAE teacher {t_entry['mae']:.2f}  student {s_entry['mae']:.2f} "
+              f"({entry['mae_change_pct']:+.1f}%)  latency {t_entry['latency_ms']:.1f} → "
+              f"{s_entry['latency_ms']:.1f} ms  params {t_entry['params']:,} → {s_entry['params']:,}")
+        return entry
+
+    def distill_all(self, stock_data, models=None):
+        """
+        distill() for every symbol of stock_data with a trained teacher
+        (models, as returned by train_all_models, or loaded from disk); writes
+        the report and returns it.
+        """
+        from tensorflow.keras.models import load_model
+
+        models  = dict(models or {})
+        loaded  = {}   # model path → teacher; a pooled teacher is shared
+        results = {}
+        for symbol, df in stock_data.items():
+            try:
+                teacher = models.get(symbol)
+                if teacher is None:
+                    path = self.trainer.model_path(symbol)
+                    if not os.path.exists(path):
+                        continue
+                    if path not in loaded:
+                        loaded[path] = load_model(path, custom_objects=custom_objects())
+                    teacher = loaded[path]
+                entry = self.distill(symbol, df, teacher)
+                if entry is not None:
+                    results[symbol] = entry
+            except Exception as ex:
+                print(f"[{symbol}] Distillation failed: {ex}")
+
+        report = {
+            'created': datetime.now().isoformat(timespec="seconds"),
+            'student': {k: getattr(self.config, k) for k in
+                        ('student_arch', 'student_units', 'student_window', 'distill_alpha')},
+            'symbols': results,
+        }
+        if results:
+            report['median'] = {
+                k: float(np.median([r[k] for r in results.values()]))
+                for k in ('mae_change_pct', 'latency_speedup', 'param_reduction')
+            }
+        path = os.path.join(self.config.logs_dir,
+                            f"distillation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.logger.info("Distilled %d students; report written to %s", len(results), path)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distil trained models into compact students")
+    parser.add_argument("--symbols", nargs="*", help="symbols to distil (default: all selected stocks)")
+    args = parser.parse_args()
+
+    config = Config()
+    if args.symbols:
+        config.selected_stocks = [s.upper() for s in args.symbols]
+    collector  = StockDataCollector(config)
+    stock_data = collector.fetch_all_stocks()
+    Distiller(config).distill_all(collector.store.load_all(stock_data))
+
+
+if __name__ == "__main__":
+    main()
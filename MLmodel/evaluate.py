@@ -1,4 +1,7 @@
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
@@ -7,10 +10,12 @@ try:
     from config import Config
     from data_collector import StockDataCollector
     from lstm_model import LSTMModelTrainer
+    from model_registry import ModelRegistry
 except ImportError:
-    from config import Config
-    from data_collector import StockDataCollector
-    from lstm_model import LSTMModelTrainer
+    from MLmodel.config import Config
+    from MLmodel.data_collector import StockDataCollector
+    from MLmodel.lstm_model import LSTMModelTrainer
+    from MLmodel.model_registry import ModelRegistry
 
 
 def evaluate_predictions(actual, predicted):
@@ -40,52 +45,121 @@ def generate_evaluation_report(symbol, actual, predicted, output_dir=None):
     return report
 
 
-def run_evaluation(config=None):
+class PredictionCache:
+    """
+    Scaled predictions of evaluation runs keyed by (symbol, model version,
+    data version): re-evaluating unchanged models on unchanged data skips
+    inference entirely. Bounded LRU; safe to share between threads.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = max(1, capacity)
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, predictions):
+        with self._lock:
+            self._entries[key] = predictions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+def _evaluate_symbol(lstm, registry, model, symbol, df, data_version, cache, lock, output_dir):
+    """Evaluation report of one symbol; model=None → the served model from registry."""
+    if model is None:
+        model, path = registry.get(symbol), lstm.serving_path(symbol)
+    else:
+        path = lstm.model_path(symbol)
+        if symbol not in lstm.scalers:
+            lstm.load_scaler(symbol)
+
+    # prepare_data with fit_scaler=False — use the saved scaler
+    X, y_scaled = lstm.prepare_data(df, symbol=symbol, fit_scaler=False)
+    if len(X) == 0:
+        return None
+
+    key = None
+    if cache is not None and data_version is not None:
+        key = (symbol, registry.version(symbol, path), data_version)
+    pred_scaled = cache.get(key) if key else None
+    if pred_scaled is None:
+        # Predict in scaled space; one model is never driven from two threads at once
+        with lock:
+            pred_scaled = lstm.predict_scaled(model, symbol, X)   # (samples, prediction_days)
+        if key:
+            cache.put(key, pred_scaled)
+
+    # Inverse-transform first prediction day back to rupee prices
+    actual    = lstm.inverse_transform_close(symbol, y_scaled[:, 0])
+    predicted = lstm.inverse_transform_close(symbol, pred_scaled[:, 0])
+    return generate_evaluation_report(symbol, actual, predicted, output_dir=output_dir)
+
+
+def run_evaluation(config=None, stock_data=None, models=None, data_versions=None,
+                   trainer=None, registry=None, cache=None):
+    """
+    Evaluates every selected symbol with a trained model → {symbol: report}.
+
+    stock_data    : in-memory market data (fetched when omitted)
+    models        : {symbol: model} just trained (loaded through the registry when omitted)
+    data_versions : {symbol: data version}; with cache (PredictionCache),
+                    predictions are reused while model and data are unchanged
+    trainer, registry : shared instances, so already loaded models and scalers are reused
+
+    Symbols are evaluated concurrently on config.evaluation_workers threads.
+    """
     if config is None:
         config = Config()
 
-    collector  = StockDataCollector(config)
-    stock_data = collector.fetch_all_stocks()
-    lstm       = LSTMModelTrainer(config)
-    reports    = {}
-
+    if stock_data is None:
+        collector     = StockDataCollector(config)
+        stock_data    = collector.fetch_all_stocks()
+        data_versions = {s: entry["version"] for s, entry in collector.store.index().items()}
+    lstm     = trainer or LSTMModelTrainer(config)
+    registry = registry or ModelRegistry(lstm, config.model_cache_size)
+    models   = models or {}
+    versions = data_versions or {}
+    locks    = {}   # id(model) → lock; a pooled model is shared by every symbol
+    reports  = {}
+
+    jobs = {}
     for symbol in config.selected_stocks:
-        try:
-            model_path = os.path.join(config.models_dir, f'{symbol}_lstm_model.keras')
-            if not os.path.exists(model_path):
+        if symbol not in stock_data:
+            continue
+        model = models.get(symbol)
+        if model is None and not os.path.exists(lstm.serving_path(symbol)):
+            continue
+        jobs[symbol] = model
+
+    def evaluate(symbol):
+        model = jobs[symbol]
+        lock  = locks.setdefault(id(model) if model is not None else lstm.serving_path(symbol),
+                                 threading.Lock())
+        return _evaluate_symbol(lstm, registry, model, symbol, stock_data[symbol],
+                                versions.get(symbol), cache, lock, config.logs_dir)
+
+    with ThreadPoolExecutor(max_workers=max(1, config.evaluation_workers)) as pool:
+        futures = {symbol: pool.submit(evaluate, symbol) for symbol in jobs}
+        for symbol, future in futures.items():
+            try:
+                report = future.result()
+            except Exception as ex:
+                print(f"Failed evaluation for {symbol}: {ex}")
                 continue
-            if symbol not in stock_data:
+            if report is None:
                 continue
-
-            from tensorflow.keras.models import load_model
-            from lstm_model import CUSTOM_OBJECTS
-            model = load_model(model_path, custom_objects=CUSTOM_OBJECTS)
-
-            # Load the per-stock scaler
-            lstm.load_scaler(symbol)
-
-            df     = stock_data[symbol]
-            # prepare_data with fit_scaler=False — use the saved scaler
-            X, y_scaled = lstm.prepare_data(df, symbol=symbol, fit_scaler=False)
-            if len(X) == 0:
-                continue
-
-            # Predict in scaled space
-            pred_scaled = model.predict(X, verbose=0)   # (samples, prediction_days)
-
-            # Inverse-transform first prediction day back to rupee prices
-            actual    = lstm.inverse_transform_close(symbol, y_scaled[:, 0])
-            predicted = lstm.inverse_transform_close(symbol, pred_scaled[:, 0])
-
-            reports[symbol] = generate_evaluation_report(
-                symbol, actual, predicted, output_dir=config.logs_dir
-            )
-            r2 = reports[symbol]['metrics']['r2']
+            reports[symbol] = report
+            r2 = report['metrics']['r2']
             print(f"[{symbol}] R²={r2:.4f}")
 
-        except Exception as ex:
-            print(f"Failed evaluation for {symbol}: {ex}")
-
     return reports
 
 
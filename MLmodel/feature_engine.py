@@ -0,0 +1,404 @@
+"""
+feature_engine.py
+-----------------
+Alternative engines for the indicators of StockDataCollector.compute_features.
+
+  - IncrementalFeatureEngine : keeps the running state behind every indicator —
+      rolling-window sums, EWM values, the OBV total and the RSI gain/loss
+      sums — so a newly appended daily bar costs O(1) instead of a full
+      recompute over the 5-year frame. Feeding it the bars of a frame one by
+      one reproduces compute_features(frame) row for row.
+  - compute_panel            : computes all indicators for the whole universe
+      in one vectorized pass (cumulative-sum window kernels, EWM recursions
+      across symbols) and returns them on a shared trading calendar as a
+      (symbols × days × fields) float32 FeaturePanel.
+
+Both agree with compute_features to floating-point round-off.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# Columns compute_features adds to the raw OHLCV frame, in the order it adds them.
+INDICATOR_COLUMNS = [
+    'Return',
+    'SMA10', 'SMA20', 'SMA50',
+    'EMA10', 'EMA20',
+    'Volatility10', 'Volatility20',
+    'VolumeChange', 'OBV',
+    'RSI14',
+    'MACD', 'Signal', 'MACD_Hist',
+    'BB_upper', 'BB_lower', 'BB_width', 'BB_pos',
+    'Momentum5', 'Momentum10', 'Momentum20',
+]
+
+# Model input features (22): Close followed by every indicator.
+FEATURES = ['Close'] + INDICATOR_COLUMNS
+
+
+def _ratio(a, b):
+    """a / b with IEEE semantics (±inf / nan) instead of ZeroDivisionError."""
+    if b == 0:
+        return math.nan if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+class _RollingWindow:
+    """
+    Fixed-size window with running sum and sum of squares.
+    Values are shifted by the first one pushed to keep the variance numerically
+    stable, and the sums are rebuilt from the window once per `size` pushes so
+    round-off cannot drift. Non-finite values poison the window (mean/std → nan)
+    until they leave it, like pandas rolling with min_periods=size.
+    """
+
+    def __init__(self, size):
+        self.size   = size
+        self.values = deque(maxlen=size)
+        self.shift  = None
+        self.sum    = 0.0
+        self.sumsq  = 0.0
+        self.bad    = 0
+        self._since_resync = 0
+
+    def push(self, x):
+        if self.shift is None and math.isfinite(x):
+            self.shift = x
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(x)
+        if math.isfinite(x):
+            d = x - self.shift
+            self.sum   += d
+            self.sumsq += d * d
+        else:
+            self.bad += 1
+        self._since_resync += 1
+        if self._since_resync >= self.size:
+            self._resync()
+
+    def _remove(self, x):
+        if math.isfinite(x):
+            d = x - self.shift
+            self.sum   -= d
+            self.sumsq -= d * d
+        else:
+            self.bad -= 1
+
+    def _resync(self):
+        finite     = [v - self.shift for v in self.values if math.isfinite(v)]
+        self.sum   = math.fsum(finite)
+        self.sumsq = math.fsum(d * d for d in finite)
+        self._since_resync = 0
+
+    def ready(self):
+        return len(self.values) == self.size and self.bad == 0
+
+    def mean(self):
+        if not self.ready():
+            return math.nan
+        return self.shift + self.sum / self.size
+
+    def std(self):
+        """Sample standard deviation (ddof=1), as pandas rolling().std()."""
+        if not self.ready():
+            return math.nan
+        var = (self.sumsq - self.sum * self.sum / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class _EWM:
+    """ewm(span=span, adjust=False).mean(), using the same update formula as pandas."""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = None
+
+    def push(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            old_wt, new_wt = 1.0 - self.alpha, self.alpha
+            self.value = (old_wt * self.value + new_wt * x) / (old_wt + new_wt)
+        return self.value
+
+
+class IncrementalFeatureEngine:
+    """
+    Per-symbol indicator state. update() consumes one raw bar and returns the
+    feature row compute_features would emit for it, or None where
+    compute_features drops the row (warm-up period or a non-finite value).
+    """
+
+    def __init__(self):
+        self.n          = 0          # bars consumed
+        self.last_date  = None
+        self.first_date = None
+        self.prev_close  = math.nan
+        self.prev_volume = math.nan
+        self.closes     = deque(maxlen=21)   # Close history for Momentum20
+
+        self.sma10  = _RollingWindow(10)
+        self.sma20  = _RollingWindow(20)     # also the Bollinger mid / std
+        self.sma50  = _RollingWindow(50)
+        self.vol10  = _RollingWindow(10)
+        self.vol20  = _RollingWindow(20)
+        self.gain14 = _RollingWindow(14)
+        self.loss14 = _RollingWindow(14)
+
+        self.ema10  = _EWM(10)
+        self.ema20  = _EWM(20)
+        self.ema12  = _EWM(12)
+        self.ema26  = _EWM(26)
+        self.signal = _EWM(9)
+        self.obv    = math.nan
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds the state by replaying every bar of a raw OHLCV frame."""
+        engine = cls()
+        for bar in df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].itertuples(index=False):
+            engine.update(*bar)
+        return engine
+
+    def update(self, date, open_, high, low, close_raw, volume_raw):
+        close, volume = float(close_raw), float(volume_raw)
+        if self.first_date is None:
+            self.first_date = date
+        self.last_date = date
+        self.n += 1
+
+        ret   = _ratio(close, self.prev_close) - 1
+        delta = close - self.prev_close
+        vchg  = _ratio(volume, self.prev_volume) - 1
+
+        self.closes.append(close)
+        for window in (self.sma10, self.sma20, self.sma50):
+            window.push(close)
+        self.vol10.push(ret)
+        self.vol20.push(ret)
+        self.gain14.push(max(delta, 0.0) if not math.isnan(delta) else math.nan)
+        self.loss14.push(-min(delta, 0.0) if not math.isnan(delta) else math.nan)
+
+        if not math.isnan(delta):
+            step     = math.copysign(1.0, delta) * volume if delta != 0 else 0.0
+            self.obv = step if math.isnan(self.obv) else self.obv + step
+
+        ema10, ema20 = self.ema10.push(close), self.ema20.push(close)
+        macd         = self.ema12.push(close) - self.ema26.push(close)
+        signal       = self.signal.push(macd)
+
+        avg_gain = self.gain14.mean()
+        avg_loss = self.loss14.mean()
+        rsi      = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-9)))
+
+        bb_mid   = self.sma20.mean()
+        bb_std   = self.sma20.std()
+        bb_upper = bb_mid + 2 * bb_std
+        bb_lower = bb_mid - 2 * bb_std
+
+        def momentum(k):
+            if len(self.closes) <= k:
+                return math.nan
+            return _ratio(close, self.closes[-k - 1]) - 1
+
+        self.prev_close, self.prev_volume = close, volume
+
+        row = {
+            'Return':       ret,
+            'SMA10':        self.sma10.mean(),
+            'SMA20':        bb_mid,
+            'SMA50':        self.sma50.mean(),
+            'EMA10':        ema10,
+            'EMA20':        ema20,
+            'Volatility10': self.vol10.std(),
+            'Volatility20': self.vol20.std(),
+            'VolumeChange': vchg,
+            'OBV':          self.obv,
+            'RSI14':        rsi,
+            'MACD':         macd,
+            'Signal':       signal,
+            'MACD_Hist':    macd - signal,
+            'BB_upper':     bb_upper,
+            'BB_lower':     bb_lower,
+            'BB_width':     (bb_upper - bb_lower) / (bb_mid + 1e-9),
+            'BB_pos':       (close - bb_lower) / (bb_upper - bb_lower + 1e-9),
+            'Momentum5':    momentum(5),
+            'Momentum10':   momentum(10),
+            'Momentum20':   momentum(20),
+        }
+        raw = (float(open_), float(high), float(low), close, volume)
+        if not all(math.isfinite(v) for v in raw) or not all(math.isfinite(v) for v in row.values()):
+            return None
+        return {'Date': date, 'Open': open_, 'High': high, 'Low': low,
+                'Close': close_raw, 'Volume': volume_raw, **row}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PANEL ENGINE
+# ─────────────────────────────────────────────────────────────────────────────
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume'] + INDICATOR_COLUMNS
+
+
+class FeaturePanel:
+    """
+    values : (symbols, days, PANEL_FIELDS) float32
+    valid  : (symbols, days) bool — rows compute_features would keep
+    """
+
+    def __init__(self, symbols, dates, values, valid):
+        self.symbols = list(symbols)
+        self.dates   = dates
+        self.fields  = list(PANEL_FIELDS)
+        self.values  = values
+        self.valid   = valid
+
+    def frame(self, symbol):
+        """Per-symbol DataFrame in compute_features layout (Date + fields, dropped rows removed)."""
+        i    = self.symbols.index(symbol)
+        keep = self.valid[i]
+        df   = pd.DataFrame(self.values[i, keep], columns=self.fields)
+        df.insert(0, 'Date', self.dates[keep])
+        return df
+
+
+def _shift(x, k):
+    """x shifted k days later along the time axis, NaN-filled."""
+    out = np.full_like(x, np.nan)
+    out[:, k:] = x[:, :-k]
+    return out
+
+
+def _rolling_mean_std(x, window):
+    """
+    Rolling mean and sample std (ddof=1) along the time axis via cumulative
+    sums. A window holding any NaN yields NaN, like pandas min_periods=window.
+    Each row is shifted by its first finite value to keep the sums small.
+    """
+    finite = np.isfinite(x)
+    first  = np.nanmax(np.where(np.cumsum(finite, axis=1) == 1, x, np.nan), axis=1, initial=-np.inf)
+    ref    = np.where(np.isfinite(first), first, 0.0)[:, None]
+    d      = np.where(finite, x - ref, 0.0)
+
+    def window_sum(a):
+        c = np.cumsum(a, axis=1)
+        out = np.full_like(c, np.nan)
+        out[:, window - 1] = c[:, window - 1]
+        out[:, window:]    = c[:, window:] - c[:, :-window]
+        return out
+
+    full = window_sum(finite.astype(np.float64)) == window
+    s1   = window_sum(d)
+    s2   = window_sum(d * d)
+    mean = np.where(full, ref + s1 / window, np.nan)
+    var  = np.maximum((s2 - s1 * s1 / window) / (window - 1), 0.0)
+    std  = np.where(full, np.sqrt(var), np.nan)
+    return mean, std
+
+
+def _ewm_panel(series, spans):
+    """
+    ewm(span, adjust=False).mean() for several (symbols, days) inputs at once:
+    one recursion over days, updating every input and symbol per step. A NaN
+    input day carries the previous value forward; a row starts at its first
+    finite value.
+    """
+    x      = np.stack(series)                                  # (inputs, symbols, days)
+    alpha  = 2.0 / (np.asarray(spans, dtype=np.float64)[:, None] + 1.0)
+    old_wt = 1.0 - alpha
+    y      = np.full_like(x, np.nan)
+    prev   = np.full(x.shape[:2], np.nan)
+    for t in range(x.shape[2]):
+        cur  = x[:, :, t]
+        step = (old_wt * prev + alpha * cur) / (old_wt + alpha)
+        prev = np.where(np.isnan(prev), cur, np.where(np.isnan(cur), prev, step))
+        y[:, :, t] = prev
+    return list(y)
+
+
+def compute_panel(frames):
+    """
+    frames : {symbol: raw OHLCV DataFrame with a Date column}
+    Computes every compute_features indicator for all symbols in one
+    vectorized pass, then places each symbol's rows on the union of all
+    trading dates. Kernels run in float64 over each symbol's own bars,
+    left-aligned (a symbol missing a day another symbol traded still steps
+    from its own previous bar, exactly as compute_features does); the stored
+    panel is float32 and the days a symbol has no row are not valid.
+    """
+    symbols   = list(frames)
+    day_lists = [frames[s]['Date'].to_numpy('datetime64[ns]') for s in symbols]
+    calendar  = np.unique(np.concatenate(day_lists))
+    raw       = np.full((len(symbols), max(len(d) for d in day_lists), 5), np.nan)
+    for i, symbol in enumerate(symbols):
+        raw[i, :len(day_lists[i])] = frames[symbol][['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(np.float64)
+    dates = pd.DatetimeIndex(calendar)
+
+    close, volume = raw[..., 3], raw[..., 4]
+    prev_close    = _shift(close, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret    = close / prev_close - 1
+        vchg   = volume / _shift(volume, 1) - 1
+        delta  = close - prev_close
+
+        sma10, _      = _rolling_mean_std(close, 10)
+        sma20, bb_std = _rolling_mean_std(close, 20)
+        sma50, _      = _rolling_mean_std(close, 50)
+        _, vol10      = _rolling_mean_std(ret, 10)
+        _, vol20      = _rolling_mean_std(ret, 20)
+
+        obv_step = np.sign(delta) * volume
+        obv      = np.where(np.isnan(obv_step), np.nan,
+                            np.cumsum(np.nan_to_num(obv_step, nan=0.0), axis=1))
+
+        avg_gain, _ = _rolling_mean_std(np.clip(delta, 0, None), 14)
+        avg_loss, _ = _rolling_mean_std(-np.clip(delta, None, 0), 14)
+        rsi         = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-9)))
+
+        ema10, ema20, ema12, ema26 = _ewm_panel([close] * 4, [10, 20, 12, 26])
+        macd      = ema12 - ema26
+        signal,   = _ewm_panel([macd], [9])
+
+        bb_upper = sma20 + 2 * bb_std
+        bb_lower = sma20 - 2 * bb_std
+        indicators = {
+            'Return':       ret,
+            'SMA10':        sma10,
+            'SMA20':        sma20,
+            'SMA50':        sma50,
+            'EMA10':        ema10,
+            'EMA20':        ema20,
+            'Volatility10': vol10,
+            'Volatility20': vol20,
+            'VolumeChange': vchg,
+            'OBV':          obv,
+            'RSI14':        rsi,
+            'MACD':         macd,
+            'Signal':       signal,
+            'MACD_Hist':    macd - signal,
+            'BB_upper':     bb_upper,
+            'BB_lower':     bb_lower,
+            'BB_width':     (bb_upper - bb_lower) / (sma20 + 1e-9),
+            'BB_pos':       (close - bb_lower) / (bb_upper - bb_lower + 1e-9),
+            'Momentum5':    close / _shift(close, 5)  - 1,
+            'Momentum10':   close / _shift(close, 10) - 1,
+            'Momentum20':   close / _shift(close, 20) - 1,
+        }
+
+    own = np.empty((len(symbols), raw.shape[1], len(PANEL_FIELDS)), dtype=np.float32)
+    own[..., :5] = raw
+    for j, name in enumerate(INDICATOR_COLUMNS, start=5):
+        own[..., j] = indicators[name]
+
+    # Each symbol's rows onto the shared calendar
+    values = np.full((len(symbols), len(dates), len(PANEL_FIELDS)), np.nan, dtype=np.float32)
+    for i, days in enumerate(day_lists):
+        values[i, np.searchsorted(calendar, days)] = own[i, :len(days)]
+    valid = np.isfinite(values).all(axis=2)
+    return FeaturePanel(symbols, dates, values, valid)
@@ -0,0 +1,123 @@
+"""
+feature_store.py
+----------------
+Columnar binary store for processed features, replacing the per-request
+processed_dir/{SYMBOL}.csv dumps.
+
+Layout under processed_dir:
+    {SYMBOL}.{version}.features.npy   (days, FEATURES) float32, FEATURES order
+    {SYMBOL}.{version}.dates.npy      (days,) datetime64[ns]
+    index.json                        {symbol: {version, rows, first, last}}
+
+`version` is a content hash of the feature matrix, so a symbol is written
+once per data version and unchanged symbols cost nothing on later fetches.
+Files are never overwritten in place — a new version gets new file names —
+so memory-mapped readers of the previous version stay valid.
+load() memory-maps the float32 matrix, which LSTMModelTrainer.prepare_data
+accepts directly.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from feature_engine import FEATURES
+except ImportError:
+    from MLmodel.feature_engine import FEATURES
+
+
+class FeatureStore:
+    def __init__(self, config):
+        self.root       = Path(config.processed_dir)
+        self.index_path = self.root / "index.json"
+        self.logger     = logging.getLogger(__name__)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ─────────────────────────────────────────────────────────
+    # INDEX
+    # ─────────────────────────────────────────────────────────
+    def index(self):
+        if not self.index_path.exists():
+            return {}
+        with open(self.index_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, index):
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def version(self, symbol):
+        """Current data version of symbol, or None if it is not stored."""
+        entry = self.index().get(symbol)
+        return entry["version"] if entry else None
+
+    def _paths(self, symbol, version):
+        return (self.root / f"{symbol}.{version}.features.npy",
+                self.root / f"{symbol}.{version}.dates.npy")
+
+    # ─────────────────────────────────────────────────────────
+    # WRITE
+    # ─────────────────────────────────────────────────────────
+    def write_all(self, stock_data):
+        """Stores {symbol: compute_features frame}; returns the symbols actually written."""
+        index, written = self.index(), []
+        for symbol, df in stock_data.items():
+            matrix  = np.ascontiguousarray(df[FEATURES].to_numpy(np.float32))
+            version = hashlib.sha1(matrix.tobytes()).hexdigest()[:16]
+            old     = index.get(symbol, {}).get("version")
+            if old == version:
+                continue
+
+            features_path, dates_path = self._paths(symbol, version)
+            np.save(features_path, matrix)
+            np.save(dates_path, df["Date"].to_numpy("datetime64[ns]"))
+            index[symbol] = {
+                "version": version,
+                "rows":    int(len(matrix)),
+                "first":   str(df["Date"].iloc[0].date()),
+                "last":    str(df["Date"].iloc[-1].date()),
+            }
+            written.append(symbol)
+            if old:
+                self._remove_version(symbol, old)
+
+        if written:
+            self._save_index(index)
+        return written
+
+    def _remove_version(self, symbol, version):
+        for path in self._paths(symbol, version):
+            try:
+                path.unlink()
+            except OSError:
+                # Still memory-mapped by a reader (Windows); left for the next write.
+                pass
+
+    # ─────────────────────────────────────────────────────────
+    # READ
+    # ─────────────────────────────────────────────────────────
+    def load(self, symbol, mmap=True):
+        """
+        Returns (dates, features) for symbol; features is (days, FEATURES) float32,
+        memory-mapped read-only unless mmap=False.
+        """
+        entry = self.index().get(symbol)
+        if entry is None:
+            raise FileNotFoundError(f"No stored features for {symbol}")
+        features_path, dates_path = self._paths(symbol, entry["version"])
+        features = np.load(features_path, mmap_mode="r" if mmap else None)
+        dates    = np.load(dates_path)
+        return dates, features
+
+    def load_all(self, symbols=None, mmap=True):
+        """{symbol: memory-mapped feature matrix} for every stored (or requested) symbol."""
+        index = self.index()
+        return {s: self.load(s, mmap=mmap)[1]
+                for s in (symbols if symbols is not None else index) if s in index}
@@ -0,0 +1,109 @@
+"""
+forecast_store.py
+-----------------
+Precomputed daily forecasts, so /predict is a key lookup.
+
+A forecast only changes when a symbol gets a new daily bar or its model is
+retrained. precompute() runs every symbol's latest window through its model
+once (after a data refresh, or from main.py) and stores the full
+prediction_days forecast in a small SQLite table keyed by symbol, together
+with the data version and model version it was computed from. get() only
+returns a row when both versions still match, so a stale forecast is never
+served — the caller falls back to live inference and write-through.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+
+
+class ForecastStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.logger  = logging.getLogger(__name__)
+        self._lock   = threading.Lock()   # serialises writers; readers use their own connection
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS forecasts (
+                    symbol        TEXT PRIMARY KEY,
+                    data_version  TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    as_of         TEXT NOT NULL,
+                    predictions   TEXT NOT NULL,
+                    created_at    TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def get(self, symbol, data_version, model_version):
+        """Stored forecast (list of rupee prices) for these versions, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT predictions FROM forecasts "
+                "WHERE symbol = ? AND data_version = ? AND model_version = ?",
+                (symbol, data_version, model_version),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stored_versions(self):
+        """{symbol: (data_version, model_version)} of every stored forecast."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT symbol, data_version, model_version FROM forecasts").fetchall()
+        return {symbol: (dv, mv) for symbol, dv, mv in rows}
+
+    def put_many(self, rows):
+        """rows: iterable of (symbol, data_version, model_version, as_of, predictions)."""
+        created = datetime.now().isoformat(timespec="seconds")
+        records = [(s, dv, mv, a, json.dumps([float(p) for p in preds]), created)
+                   for s, dv, mv, a, preds in rows]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?)", records)
+
+    def put(self, symbol, data_version, model_version, as_of, predictions):
+        self.put_many([(symbol, data_version, model_version, as_of, predictions)])
+
+    def precompute(self, trainer, registry, stock_data, data_versions):
+        """
+        Forecasts every symbol of stock_data that has a trained model and a
+        data version and stores the results; returns the symbols written.
+        Symbols whose stored forecast already has the current data and model
+        version are skipped, so a refresh that changed nothing runs no
+        inference. Inference is batched through trainer.predict_batch.
+        """
+        stored = self.stored_versions()
+        models, windows, model_versions = {}, {}, {}
+        for symbol, df in stock_data.items():
+            if data_versions.get(symbol) is None:
+                continue   # nothing a later get() could match the row against
+            try:
+                # Version first: if a retrain lands in between, the row is
+                # stored under the old version and simply never matches.
+                model_versions[symbol] = registry.version(symbol)
+                if stored.get(symbol) == (data_versions[symbol], model_versions[symbol]):
+                    continue
+                models[symbol] = registry.get(symbol)
+            except FileNotFoundError:
+                continue
+            window = trainer.prepare_last_window(df, symbol)
+            if window is not None:
+                windows[symbol] = window
+
+        forecasts = trainer.predict_batch(models, windows)
+        if not forecasts:
+            return []
+        ordered = list(forecasts)
+        prices  = trainer.inverse_transform_close_many(ordered, np.stack([forecasts[s] for s in ordered]))
+        self.put_many(
+            (s, data_versions[s], model_versions[s],
+             str(stock_data[s]["Date"].iloc[-1].date()), row)
+            for s, row in zip(ordered, prices)
+        )
+        self.logger.info("Precomputed forecasts for %d symbols", len(ordered))
+        return ordered
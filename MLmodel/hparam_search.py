@@ -0,0 +1,206 @@
+"""
+hparam_search.py
+----------------
+Per-symbol hyperparameter search with successive halving.
+
+    python hparam_search.py [--symbols TCS INFY ...]
+
+For each symbol, search_trials configurations are sampled from SEARCH_SPACE
+(lookback window, batch size and the build_model branch widths) and trained
+for search_min_epochs. Only the best 1/search_eta by validation loss survive
+each rung; survivors continue from their checkpoint for search_eta times as
+many epochs, until one configuration is left or the config.epochs budget is
+reached. Trials of a rung run in parallel worker processes (search_workers),
+partitioned over the CPUs like train_parallel.
+
+Every trial is validated on the same target days (the held-out split of the
+longest lookback window), so trials with different lookbacks are comparable.
+
+The winner is written to {models_dir}/{SYMBOL}_hparams.json, which
+LSTMModelTrainer.train_all_models (fit_symbol) picks up. Inference follows
+once the symbol has been retrained with it: the window length served is the
+one recorded in the saved model's training metadata.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    from config import Config
+    from data_collector import StockDataCollector
+    from lstm_model import LSTMModelTrainer, custom_objects, _init_training_worker
+except ImportError:
+    from MLmodel.config import Config
+    from MLmodel.data_collector import StockDataCollector
+    from MLmodel.lstm_model import LSTMModelTrainer, custom_objects, _init_training_worker
+
+
+SEARCH_SPACE = {
+    'lookback_window': [60, 90, 120],
+    'batch_size':      [16, 32, 64],
+    'cnn_filters':     [16, 32, 64],
+    'lstm_units':      [32, 64, 96],
+    'dense_units':     [128, 256],
+}
+
+
+def _run_trial(config, params, symbol, df, val_start, initial_epoch, epochs, checkpoint):
+    """
+    Trains one configuration from initial_epoch up to epochs, resuming from
+    checkpoint after the first rung; returns the final validation loss.
+    Validation windows are those whose forecast starts on day val_start or
+    later, so every trial is scored on the same target days whatever its
+    lookback window. Module-level so the spawn-based process pool can pickle it.
+    """
+    from tensorflow.keras.models import load_model
+
+    trial_config = copy.copy(config)
+    vars(trial_config).update(params)
+    trainer = LSTMModelTrainer(trial_config, use_hparams=False)
+    X, y    = trainer.prepare_data(df, symbol=symbol, fit_scaler=True)
+    split   = val_start - X.shape[1]
+    if split < 50 or split >= len(X):
+        return float('inf')
+
+    if initial_epoch:
+        model = load_model(checkpoint, custom_objects=custom_objects())
+    else:
+        model = trainer.build_model(input_shape=(X.shape[1], X.shape[2]))
+    history = model.fit(
+        X[:split], y[:split],
+        validation_data=(X[split:], y[split:]),
+        batch_size=trial_config.batch_size,
+        initial_epoch=initial_epoch,
+        epochs=epochs,
+        verbose=0
+    )
+    model.save(checkpoint)
+    return float(history.history['val_loss'][-1])
+
+
+class SuccessiveHalvingSearch:
+    def __init__(self, config, seed=0):
+        self.config  = config
+        self.trainer = LSTMModelTrainer(config)
+        self.logger  = logging.getLogger(__name__)
+        self.rng     = random.Random(seed)
+
+    def sample(self, n):
+        """n distinct configurations from SEARCH_SPACE; the current config is always one of them."""
+        current = {k: getattr(self.config, k) for k in SEARCH_SPACE}
+        trials, seen = [current], {tuple(current.items())}
+        limit = 1
+        for values in SEARCH_SPACE.values():
+            limit *= len(values)
+        while len(trials) < min(n, limit):
+            params = {k: self.rng.choice(v) for k, v in SEARCH_SPACE.items()}
+            if tuple(params.items()) not in seen:
+                seen.add(tuple(params.items()))
+                trials.append(params)
+        return trials
+
+    def validation_start(self, df, trials):
+        """
+        First target day of the validation windows shared by all trials: the
+        train_ratio split of the trial with the longest lookback window.
+        """
+        longest = max(t['lookback_window'] for t in trials.values())
+        samples = len(df) - longest - self.config.prediction_days + 1
+        return longest + int(samples * self.config.train_ratio)
+
+    def _run_rung(self, pool, symbol, df, val_start, trials, initial_epoch, epochs, workdir):
+        """Runs every live trial of a rung → {trial index: val_loss}."""
+        jobs = {i: (self.config, trials[i], symbol, df, val_start, initial_epoch, epochs,
+                    os.path.join(workdir, f"trial_{i}.keras")) for i in trials}
+        if pool is None:
+            return {i: _run_trial(*args) for i, args in jobs.items()}
+        futures = {i: pool.submit(_run_trial, *args) for i, args in jobs.items()}
+        return {i: f.result() for i, f in futures.items()}
+
+    def search(self, symbol, df, pool=None):
+        """Successive halving for one symbol; writes and returns the winning params."""
+        eta      = self.config.search_eta
+        trials   = dict(enumerate(self.sample(self.config.search_trials)))
+        start    = self.validation_start(df, trials)
+        workdir  = os.path.join(self.config.models_dir, "search", symbol)
+        os.makedirs(workdir, exist_ok=True)
+
+        done, budget = 0, self.config.search_min_epochs
+        try:
+            while True:
+                budget = min(budget, self.config.epochs)
+                losses = self._run_rung(pool, symbol, df, start, trials, done, budget, workdir)
+                ranked = sorted(losses, key=losses.get)
+                print(f"[{symbol}] rung @ {budget} epochs: " +
+                      "  ".join(f"#{i}={losses[i]:.5f}" for i in ranked))
+                keep = max(1, len(ranked) // eta)
+                if keep == 1 or budget >= self.config.epochs:
+                    best = ranked[0]
+                    break
+                trials = {i: trials[i] for i in ranked[:keep]}
+                done, budget = budget, budget * eta
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        result = {
+            'params':   trials[best],
+            'val_loss': losses[best],
+            'epochs':   budget,
+            'searched': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(self.trainer.hparams_path(symbol), 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"[{symbol}] best {trials[best]}  val_loss={losses[best]:.6f}")
+        return trials[best]
+
+    def search_all(self, stock_data):
+        """search() for every symbol; trials of a rung share one process pool."""
+        workers = self.config.search_workers
+        results = {}
+        if workers <= 1:
+            pool = None
+        else:
+            ctx    = multiprocessing.get_context('spawn')   # TF is not fork-safe
+            blocks = ctx.Queue()
+            for block in self.trainer._core_blocks(workers):
+                blocks.put(block)
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=ctx,
+                initializer=_init_training_worker,
+                initargs=(blocks, self.config.intra_op_threads, self.config.inter_op_threads),
+            )
+        try:
+            for symbol, df in stock_data.items():
+                try:
+                    results[symbol] = self.search(symbol, df, pool)
+                except Exception as ex:
+                    print(f"[{symbol}] Search failed: {ex}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-symbol hyperparameter search")
+    parser.add_argument("--symbols", nargs="*", help="symbols to tune (default: all selected stocks)")
+    args = parser.parse_args()
+
+    config = Config()
+    if args.symbols:
+        config.selected_stocks = [s.upper() for s in args.symbols]
+    collector  = StockDataCollector(config)
+    stock_data = collector.fetch_all_stocks()
+    SuccessiveHalvingSearch(config).search_all(collector.store.load_all(stock_data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+lstm_layers.py
+--------------
+Custom Keras layers of the forecasting models, and the custom_objects
+load_model needs for them. Kept apart from lstm_model.py because importing
+it loads TensorFlow: lstm_model imports it only when a Keras model is
+built, trained or loaded, so serving exported .tflite models never does.
+"""
+
+import tensorflow as tf
+import keras
+from tensorflow.keras.layers import Dense
+
+
+# ── Custom Layers ──────────────────────────────────────────────────────────────
+# @keras.saving.register_keras_serializable() is REQUIRED for any custom layer
+# used inside a Functional Model saved with model.save().
+# Without it, load_model() cannot locate the class and raises a deserialization error.
+
+@keras.saving.register_keras_serializable(package='InvestIQ')
+class TemporalAttention(tf.keras.layers.Layer):
+    """
+    Soft attention over the time axis.
+    Learns which timesteps matter most and returns a weighted sum of hidden states.
+    """
+    def __init__(self, units, **kwargs):
+        super().__init__(**kwargs)
+        self.units = units
+        self.W = Dense(units, use_bias=False)
+        self.V = Dense(1,     use_bias=False)
+
+    def call(self, hidden_states):
+        score   = self.V(tf.nn.tanh(self.W(hidden_states)))  # (batch, T, 1)
+        weights = tf.nn.softmax(score, axis=1)               # (batch, T, 1)
+        context = tf.reduce_sum(weights * hidden_states, axis=1)  # (batch, units)
+        return context
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({'units': self.units})
+        return config
+
+
+@keras.saving.register_keras_serializable(package='InvestIQ')
+class ChannelAttention(tf.keras.layers.Layer):
+    """
+    Squeeze-and-Excitation style channel attention.
+    Learns which features (channels) are most informative and rescales them.
+    """
+    def __init__(self, reduction_ratio=4, **kwargs):
+        super().__init__(**kwargs)
+        self.reduction_ratio = reduction_ratio
+
+    def build(self, input_shape):
+        channels = input_shape[-1]
+        reduced  = max(1, channels // self.reduction_ratio)
+        self.fc1 = Dense(reduced,   activation='relu',    use_bias=False)
+        self.fc2 = Dense(channels,  activation='sigmoid', use_bias=False)
+        super().build(input_shape)
+
+    def call(self, x):
+        # x: (batch, timesteps, channels)
+        gap      = tf.reduce_mean(x, axis=1)        # (batch, channels)
+        squeezed = self.fc2(self.fc1(gap))           # (batch, channels)
+        squeezed = tf.expand_dims(squeezed, axis=1)  # (batch, 1, channels)
+        return x * squeezed
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({'reduction_ratio': self.reduction_ratio})
+        return config
+
+
+# ── Helper: custom_objects dict for load_model ────────────────────────────────
+CUSTOM_OBJECTS = {
+    'TemporalAttention': TemporalAttention,
+    'ChannelAttention':  ChannelAttention,
+}
@@ -1,125 +1,203 @@
 import os
+import copy
+import json
+import shutil
+import logging
+import traceback
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 import numpy as np
-import joblib
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 
-import tensorflow as tf
-import keras
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import (
-    Input, LSTM, Dense, Dropout, Bidirectional,
-    BatchNormalization, LayerNormalization,
-    Conv1D, GlobalAveragePooling1D,
-    MultiHeadAttention, Add, Concatenate, Activation
-)
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.regularizers import l2
+# TensorFlow / Keras are imported inside the methods that build, train, export
+# or load Keras models, so a process that only serves .tflite exports (see
+# TFLiteForecaster) never loads them.
 
 
 # ── Feature list (22 features from data_collector) ────────────────────────────
-FEATURES = [
-    'Close', 'Return',
-    'SMA10', 'SMA20', 'SMA50',
-    'EMA10', 'EMA20',
-    'Volatility10', 'Volatility20',
-    'VolumeChange', 'OBV',
-    'RSI14',
-    'MACD', 'Signal', 'MACD_Hist',
-    'BB_upper', 'BB_lower', 'BB_width', 'BB_pos',
-    'Momentum5', 'Momentum10', 'Momentum20'
-]
+# Close + the 21 indicators of compute_features, in the order the feature store
+# lays them out on disk.
+try:
+    from feature_engine import FEATURES
+    from scaler_store import ScalerStore
+    from training_run import RunManifest
+except ImportError:
+    from MLmodel.feature_engine import FEATURES
+    from MLmodel.scaler_store import ScalerStore
+    from MLmodel.training_run import RunManifest
 NUM_FEATURES = len(FEATURES)  # 22
 
 
-# ── Custom Layers ──────────────────────────────────────────────────────────────
-# @keras.saving.register_keras_serializable() is REQUIRED for any custom layer
-# used inside a Functional Model saved with model.save().
-# Without it, load_model() cannot locate the class and raises a deserialization error.
+def custom_objects():
+    """custom_objects for load_model (lstm_layers.py; importing it loads TensorFlow)."""
+    try:
+        from lstm_layers import CUSTOM_OBJECTS
+    except ImportError:
+        from MLmodel.lstm_layers import CUSTOM_OBJECTS
+    return CUSTOM_OBJECTS
 
-@keras.saving.register_keras_serializable(package='InvestIQ')
-class TemporalAttention(tf.keras.layers.Layer):
+
+# ── Execution modes ───────────────────────────────────────────────────────────
+
+def cpu_supports_bfloat16():
+    """True when the CPU has native bfloat16 arithmetic (AVX512_BF16 or AMX_BF16)."""
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def _float32_config(config):
+    """Model config with every layer's dtype policy replaced by float32."""
+    if isinstance(config, dict):
+        if config.get('class_name') == 'DTypePolicy':
+            return 'float32'
+        return {k: _float32_config(v) for k, v in config.items()}
+    if isinstance(config, list):
+        return [_float32_config(v) for v in config]
+    return config
+
+
+# ── Parallel training workers ─────────────────────────────────────────────────
+# Module-level so the spawn-based process pool can pickle them by reference.
+
+def _init_training_worker(core_blocks, intra_op_threads, inter_op_threads):
     """
-    Soft attention over the time axis.
-    Learns which timesteps matter most and returns a weighted sum of hidden states.
+    Runs once per worker process before any TF op: takes its own block of
+    cores, pins the process to it (where the OS supports affinity) and sizes
+    TensorFlow's thread pools to that budget.
     """
-    def __init__(self, units, **kwargs):
-        super().__init__(**kwargs)
-        self.units = units
-        self.W = Dense(units, use_bias=False)
-        self.V = Dense(1,     use_bias=False)
-
-    def call(self, hidden_states):
-        score   = self.V(tf.nn.tanh(self.W(hidden_states)))  # (batch, T, 1)
-        weights = tf.nn.softmax(score, axis=1)               # (batch, T, 1)
-        context = tf.reduce_sum(weights * hidden_states, axis=1)  # (batch, units)
-        return context
-
-    def get_config(self):
-        config = super().get_config()
-        config.update({'units': self.units})
-        return config
-
-
-@keras.saving.register_keras_serializable(package='InvestIQ')
-class ChannelAttention(tf.keras.layers.Layer):
+    import tensorflow as tf
+
+    cores = core_blocks.get()
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads or max(1, len(cores)))
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def _train_symbol_worker(config, symbol, df):
     """
-    Squeeze-and-Excitation style channel attention.
-    Learns which features (channels) are most informative and rescales them.
+    Trains one symbol in a worker process; returns picklable results only.
+    The scaler goes back to the parent, which writes all of them to the
+    shared scaler store at once instead of racing other workers.
     """
-    def __init__(self, reduction_ratio=4, **kwargs):
-        super().__init__(**kwargs)
-        self.reduction_ratio = reduction_ratio
+    trainer = LSTMModelTrainer(config)
+    trainer.persist_scalers = False
+    result  = trainer.fit_symbol(symbol, df)
+    if result is None:
+        return None
+    _, metrics = result
+    return {
+        'metrics':    metrics,
+        'model_path': trainer.model_path(symbol),
+        'scaler':     trainer.scalers[symbol],
+    }
+
+
+# ── TFLite serving runtime ────────────────────────────────────────────────────
+
+TFLITE_VARIANTS = ('float16', 'int8')   # float16 weights / dynamic-range int8 weights
 
-    def build(self, input_shape):
-        channels = input_shape[-1]
-        reduced  = max(1, channels // self.reduction_ratio)
-        self.fc1 = Dense(reduced,   activation='relu',    use_bias=False)
-        self.fc2 = Dense(channels,  activation='sigmoid', use_bias=False)
-        super().build(input_shape)
 
-    def call(self, x):
-        # x: (batch, timesteps, channels)
-        gap      = tf.reduce_mean(x, axis=1)        # (batch, channels)
-        squeezed = self.fc2(self.fc1(gap))           # (batch, channels)
-        squeezed = tf.expand_dims(squeezed, axis=1)  # (batch, 1, channels)
-        return x * squeezed
+def _tflite_interpreter_class():
+    """The lightest TFLite interpreter installed; full TensorFlow only as a last resort."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter   # standalone LiteRT runtime
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter   # its predecessor
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
 
-    def get_config(self):
-        config = super().get_config()
-        config.update({'reduction_ratio': self.reduction_ratio})
-        return config
 
+class TFLiteForecaster:
+    """
+    Forward pass of an exported .tflite forecasting model behind the small
+    Keras surface the serving code uses (inputs, __call__, predict), so
+    ModelRegistry can hand it out in place of a Keras model.
+    The exported graph has a static batch of 1; batches run window by window.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path        = path
+        self.interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.inputs  = self.interpreter.get_input_details()   # 2 entries for a pooled model
+        self._window = next(d['index'] for d in self.inputs if d['dtype'] == np.float32)
+        self._symbol = next((d['index'] for d in self.inputs if d['dtype'] != np.float32), None)
+        output       = self.interpreter.get_output_details()[0]
+        self._output = output['index']
+        self._days   = int(output['shape'][-1])
+        self._lock   = threading.Lock()   # an interpreter must not be invoked concurrently
+
+    def __call__(self, inputs, training=False):
+        X, ids = inputs if isinstance(inputs, (list, tuple)) else (inputs, None)
+        X   = np.asarray(X, dtype=np.float32)
+        out = np.empty((len(X), self._days), dtype=np.float32)
+        with self._lock:
+            for i in range(len(X)):
+                self.interpreter.set_tensor(self._window, X[i:i + 1])
+                if self._symbol is not None:
+                    self.interpreter.set_tensor(self._symbol, np.asarray(ids[i:i + 1], dtype=np.int32))
+                self.interpreter.invoke()
+                out[i] = self.interpreter.get_tensor(self._output)[0]
+        return out
 
-# ── Helper: custom_objects dict for load_model ────────────────────────────────
-CUSTOM_OBJECTS = {
-    'TemporalAttention': TemporalAttention,
-    'ChannelAttention':  ChannelAttention,
-}
+    def predict(self, inputs, verbose=0, batch_size=None):
+        return self(inputs)
+
+    def predict_on_batch(self, inputs):
+        return self(inputs)
 
 
 # ── Main Trainer Class ─────────────────────────────────────────────────────────
 
 class LSTMModelTrainer:
-    def __init__(self, config):
-        self.config  = config
-        self.scalers = {}
+    def __init__(self, config, use_hparams=True):
+        """use_hparams=False: config is authoritative, tuned {symbol}_hparams.json files are ignored."""
+        self.config          = config
+        self.use_hparams     = use_hparams
+        self.scalers         = {}
+        self.scaler_store    = ScalerStore(config.scalers_dir)
+        self.persist_scalers = True   # False: fitted scalers stay in self.scalers only
+        self._pooled_symbols = None   # (mtime_ns, symbols) cache of pooled_symbols.json
+        self._hparams        = {}     # symbol → (mtime_ns, params) cache of hparams files
+        self._lookbacks      = {}     # symbol → (mtime_ns, lookback) cache of training metadata
+        self._provenance     = {}     # artifact → (mtime_ns, provenance) cache of sidecar files
+        self.last_run        = None   # RunManifest of the latest train_all_models call
+        self.pinned          = False  # set by ModelRegistry.hold(): cached window lengths are not re-read
+        self.logger          = logging.getLogger(__name__)
 
     # ─────────────────────────────────────────────────────────
     # DATA PREPARATION
     # ─────────────────────────────────────────────────────────
-    def prepare_data(self, df, symbol=None, fit_scaler=False):
+    def _feature_matrix(self, df, rows=None):
         """
-        Returns:
-            X        : (samples, lookback_window, NUM_FEATURES)  float32
-            y_scaled : (samples, prediction_days)                float32
-        fit_scaler=True  → fit a new MinMaxScaler and store in self.scalers[symbol]
-        fit_scaler=False → use already-fitted scaler from self.scalers[symbol]
+        (days, features) float32 matrix in FEATURES order plus the column names.
+        df may be a compute_features DataFrame or a (days, NUM_FEATURES) float32
+        matrix in FEATURES order, e.g. a memory-mapped FeatureStore.load() array,
+        which is used without copying. rows=k keeps only the last k days.
         """
-        available = [f for f in FEATURES if f in df.columns]
-        data = df[available].values.astype(np.float32)
-        data = np.nan_to_num(data, nan=0.0, posinf=0.0, neginf=0.0)
+        if isinstance(df, np.ndarray):
+            available = FEATURES
+            data = np.asarray(df, dtype=np.float32)
+        else:
+            available = [f for f in FEATURES if f in df.columns]
+            data = df[available].values.astype(np.float32)
+        if rows is not None:
+            data = data[-rows:]
+        if not np.isfinite(data).all():
+            data = np.nan_to_num(data, nan=0.0, posinf=0.0, neginf=0.0)
+        return data, available
 
+    def _scale(self, data, symbol, fit_scaler):
         if fit_scaler:
             scaler = MinMaxScaler(feature_range=(0, 1))
             data   = scaler.fit_transform(data)
@@ -127,18 +205,48 @@ class LSTMModelTrainer:
                 self.scalers[symbol] = scaler
         elif symbol and symbol in self.scalers:
             data = self.scalers[symbol].transform(data)
+        return data.astype(np.float32, copy=False)
+
+    def prepare_data(self, df, symbol=None, fit_scaler=False):
+        """
+        Returns:
+            X        : (samples, lookback_window, NUM_FEATURES)  float32
+            y_scaled : (samples, prediction_days)                float32
+        Both are read-only strided views over one scaled feature matrix — no
+        window is copied. See _feature_matrix for the accepted df types.
+        fit_scaler=True  → fit a new MinMaxScaler and store in self.scalers[symbol];
+                           windows of config.lookback_window (a model about to be trained)
+        fit_scaler=False → use already-fitted scaler from self.scalers[symbol];
+                           windows of lookback_window(symbol) (the saved model)
+        """
+        data, available = self._feature_matrix(df)
+        data = self._scale(data, symbol, fit_scaler)
 
         close_idx = available.index('Close') if 'Close' in available else 0
-        lw  = self.config.lookback_window
+        lw  = self.config.lookback_window if fit_scaler else self.lookback_window(symbol)
         pd_ = self.config.prediction_days
 
-        X, y_scaled = [], []
-        for i in range(lw, len(data) - pd_ + 1):
-            X.append(data[i - lw:i, :])
-            y_scaled.append(data[i:i + pd_, close_idx])
+        samples = len(data) - lw - pd_ + 1
+        if samples <= 0:
+            return (np.empty((0, lw, data.shape[1]), dtype=np.float32),
+                    np.empty((0, pd_), dtype=np.float32))
 
-        return (np.array(X, dtype=np.float32),
-                np.array(y_scaled, dtype=np.float32))
+        # sliding_window_view(...)[i] is data[i:i + lw].T — transpose back to (lw, features)
+        X        = sliding_window_view(data, lw, axis=0)[:samples].transpose(0, 2, 1)
+        y_scaled = sliding_window_view(data[lw:, close_idx], pd_)[:samples]
+        return X, y_scaled
+
+    def prepare_last_window(self, df, symbol):
+        """
+        Inference input: the most recent lookback_window days, scaled with the
+        fitted scaler of symbol → (1, lookback_window, NUM_FEATURES) float32,
+        or None when there is not enough history. Only those rows are scaled.
+        """
+        lw      = self.lookback_window(symbol)
+        data, _ = self._feature_matrix(df, rows=lw)
+        if len(data) < lw:
+            return None
+        return self._scale(data, symbol, fit_scaler=False)[np.newaxis]
 
     # ─────────────────────────────────────────────────────────
     # MODEL ARCHITECTURE
@@ -153,35 +261,97 @@ class LSTMModelTrainer:
           Branch C — Transformer  : Multi-Head Self-Attention block
           All branches merged → deep residual dense head → prediction_days output
         """
-        reg    = l2(1e-4)
-        inputs = Input(shape=input_shape, name='input')
+        from tensorflow.keras.layers import Input
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.regularizers import l2
+
+        with self._precision_policy():
+            reg    = l2(1e-4)
+            inputs = Input(shape=input_shape, name='input')
+            merged = self._build_branches(inputs, reg)
+            output = self._build_head(merged, reg)
+
+            model = Model(inputs=inputs, outputs=output, name='DeepLSTM_InvestIQ')
+            self._compile(model)
+        return model
+
+    @contextmanager
+    def _precision_policy(self):
+        """
+        Dtype policy for the layers built inside the block: config.mixed_precision
+        ("mixed_bfloat16") where the CPU has native bfloat16, float32 otherwise.
+        The previous global policy is restored on exit, so models built later
+        in the process (the recommender, students) do not inherit it.
+        """
+        policy = 'float32'
+        if self.config.mixed_precision == 'mixed_bfloat16':
+            if cpu_supports_bfloat16():
+                policy = 'mixed_bfloat16'
+            else:
+                self.logger.warning("mixed_bfloat16 requested but this CPU has no native bfloat16; using float32.")
+        import keras
+
+        previous = keras.mixed_precision.global_policy()
+        keras.mixed_precision.set_global_policy(policy)
+        try:
+            yield
+        finally:
+            keras.mixed_precision.set_global_policy(previous)
+
+    def _compile(self, model):
+        from tensorflow.keras.optimizers import Adam
+
+        # "auto" leaves XLA off on CPU-only hosts; config.jit_compile forces it on
+        model.compile(
+            optimizer=Adam(learning_rate=1e-3, clipnorm=1.0),
+            loss='huber',
+            metrics=['mae'],
+            jit_compile=True if self.config.jit_compile else "auto"
+        )
+
+    def _build_branches(self, inputs, reg):
+        """
+        Branches A–C of build_model, merged → (batch, 4·cnn_filters + lstm_units + NUM_FEATURES).
+        Widths (including the TemporalAttention score layer) scale with
+        config.cnn_filters / lstm_units; the defaults (32 / 64) give the
+        original 128 + 64 + NUM_FEATURES.
+        """
+        from tensorflow.keras.layers import (
+            LSTM, Dropout, Bidirectional, BatchNormalization, LayerNormalization,
+            Conv1D, GlobalAveragePooling1D, MultiHeadAttention, Add, Concatenate,
+        )
+        TemporalAttention = custom_objects()['TemporalAttention']
+        ChannelAttention  = custom_objects()['ChannelAttention']
+
+        f = self.config.cnn_filters
+        u = self.config.lstm_units
 
         # ── Branch A: CNN Feature Extractor ───────────────────────────────────
-        cnn = Conv1D(32,  kernel_size=3, padding='causal',
+        cnn = Conv1D(f,     kernel_size=3, padding='causal',
                      activation='relu', kernel_regularizer=reg)(inputs)
         cnn = BatchNormalization()(cnn)
-        cnn = Conv1D(64,  kernel_size=3, padding='causal',
+        cnn = Conv1D(2 * f, kernel_size=3, padding='causal',
                      activation='relu', kernel_regularizer=reg)(cnn)
         cnn = BatchNormalization()(cnn)
-        cnn = Conv1D(128, kernel_size=3, padding='causal',
+        cnn = Conv1D(4 * f, kernel_size=3, padding='causal',
                      activation='relu', kernel_regularizer=reg)(cnn)
         cnn = BatchNormalization()(cnn)
         cnn = Dropout(0.2)(cnn)
-        cnn_out = GlobalAveragePooling1D()(cnn)                  # (batch, 128)
+        cnn_out = GlobalAveragePooling1D()(cnn)                  # (batch, 4f)
 
         # ── Branch B: Stacked BiLSTM + ChannelAttention + Residuals ──────────
 
         # Block 1
-        b1  = Bidirectional(LSTM(64, return_sequences=True,
+        b1  = Bidirectional(LSTM(u, return_sequences=True,
                                  kernel_regularizer=reg))(inputs)
         b1  = ChannelAttention(reduction_ratio=4)(b1)
         b1  = LayerNormalization()(b1)
         b1  = Dropout(0.3)(b1)
-        r1  = Conv1D(128, kernel_size=1, padding='same')(inputs)  # project to 128
+        r1  = Conv1D(2 * u, kernel_size=1, padding='same')(inputs)  # project to 2u
         b1  = Add()([b1, r1])
 
         # Block 2
-        b2  = Bidirectional(LSTM(64, return_sequences=True,
+        b2  = Bidirectional(LSTM(u, return_sequences=True,
                                  kernel_regularizer=reg))(b1)
         b2  = ChannelAttention(reduction_ratio=4)(b2)
         b2  = LayerNormalization()(b2)
@@ -189,15 +359,15 @@ class LSTMModelTrainer:
         b2  = Add()([b2, b1])                                     # same shape → direct residual
 
         # Block 3
-        b3  = Bidirectional(LSTM(32, return_sequences=True,
+        b3  = Bidirectional(LSTM(u // 2, return_sequences=True,
                                  kernel_regularizer=reg))(b2)
         b3  = ChannelAttention(reduction_ratio=4)(b3)
         b3  = LayerNormalization()(b3)
         b3  = Dropout(0.15)(b3)
-        r3  = Conv1D(64, kernel_size=1, padding='same')(b2)       # project 128 → 64
+        r3  = Conv1D(2 * (u // 2), kernel_size=1, padding='same')(b2)   # project 2u → u
         b3  = Add()([b3, r3])
 
-        lstm_out = TemporalAttention(64)(b3)                      # (batch, 64)
+        lstm_out = TemporalAttention(u)(b3)                       # (batch, u)
 
         # ── Branch C: Multi-Head Self-Attention (Transformer block) ──────────
         attn     = MultiHeadAttention(num_heads=4, key_dim=16, dropout=0.1)(inputs, inputs)
@@ -206,131 +376,913 @@ class LSTMModelTrainer:
         attn_out = GlobalAveragePooling1D()(attn)                 # (batch, NUM_FEATURES)
 
         # ── Merge all 3 branches ──────────────────────────────────────────────
-        merged = Concatenate()([cnn_out, lstm_out, attn_out])
-        # merged shape: (batch, 128 + 64 + NUM_FEATURES)
+        return Concatenate()([cnn_out, lstm_out, attn_out])
+
+    def _build_head(self, merged, reg):
+        """Deep dense head of build_model → (batch, prediction_days)."""
+        from tensorflow.keras.layers import Dense, Dropout, LayerNormalization, Add, Activation
 
         # ── Deep Dense Head with residual skip connections ────────────────────
-        d1    = Dense(256, kernel_regularizer=reg)(merged)
+        d     = self.config.dense_units   # 256 → 256 / 128 / 64 / 32
+        d1    = Dense(d, kernel_regularizer=reg)(merged)
         d1    = LayerNormalization()(d1)
         d1    = Activation('relu')(d1)
         d1    = Dropout(0.3)(d1)
 
-        d2    = Dense(128, kernel_regularizer=reg)(d1)
+        d2    = Dense(d // 2, kernel_regularizer=reg)(d1)
         d2    = LayerNormalization()(d2)
         d2    = Activation('relu')(d2)
         d2    = Dropout(0.2)(d2)
-        skip2 = Dense(128)(d1)
+        skip2 = Dense(d // 2)(d1)
         d2    = Add()([d2, skip2])
 
-        d3    = Dense(64, activation='relu')(d2)
+        d3    = Dense(d // 4, activation='relu')(d2)
         d3    = Dropout(0.1)(d3)
-        d4    = Dense(32, activation='relu')(d3)
+        d4    = Dense(d // 8, activation='relu')(d3)
 
-        output = Dense(self.config.prediction_days, name='output')(d4)
+        # float32 output keeps the loss and forecasts full precision under mixed_bfloat16
+        return Dense(self.config.prediction_days, dtype='float32', name='output')(d4)
 
-        model = Model(inputs=inputs, outputs=output, name='DeepLSTM_InvestIQ')
-        model.compile(
-            optimizer=Adam(learning_rate=1e-3, clipnorm=1.0),
-            loss='huber',
-            metrics=['mae']
-        )
+    def build_pooled_model(self, input_shape, num_symbols):
+        """
+        One model for the whole universe: build_model's branches and head with
+        a learned symbol embedding concatenated into the merged representation.
+        Inputs: [window (batch, lookback, features), symbol id (batch, 1) int32].
+        """
+        from tensorflow.keras.layers import Input, Embedding, Concatenate, Flatten
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.regularizers import l2
+
+        with self._precision_policy():
+            reg       = l2(1e-4)
+            inputs    = Input(shape=input_shape, name='input')
+            symbol_in = Input(shape=(1,), dtype='int32', name='symbol')
+            embedding = Embedding(num_symbols, self.config.symbol_embedding_dim,
+                                  name='symbol_embedding')(symbol_in)
+            merged = Concatenate()([self._build_branches(inputs, reg), Flatten()(embedding)])
+            output = self._build_head(merged, reg)
+
+            model = Model(inputs=[inputs, symbol_in], outputs=output, name='PooledLSTM_InvestIQ')
+            self._compile(model)
+        return model
+
+    def build_student_model(self, input_shape):
+        """
+        Compact student for distillation (see distillation.py). Takes the same
+        (lookback_window, NUM_FEATURES) windows as the teacher but only looks
+        at the last config.student_window steps:
+          "gru" — one GRU layer of student_units
+          "tcn" — dilated causal Conv1D stack (dilations 1, 2, 4, 8), read at the last step
+        """
+        from tensorflow.keras.layers import Input, Dense, Conv1D, Flatten, GRU, Cropping1D
+        from tensorflow.keras.models import Model
+
+        with self._precision_policy():
+            steps  = min(self.config.student_window or input_shape[0], input_shape[0])
+            inputs = Input(shape=input_shape, name='input')
+            x      = Cropping1D((input_shape[0] - steps, 0))(inputs)
+            units  = self.config.student_units
+
+            if self.config.student_arch == "tcn":
+                for rate in (1, 2, 4, 8):
+                    x = Conv1D(units, 3, padding='causal', dilation_rate=rate, activation='relu')(x)
+                x = Flatten()(Cropping1D((steps - 1, 0))(x))
+            elif self.config.student_arch == "gru":
+                x = GRU(units)(x)
+            else:
+                raise ValueError(f"Unknown student_arch {self.config.student_arch!r}")
+
+            output = Dense(self.config.prediction_days, dtype='float32', name='output')(x)
+            model  = Model(inputs=inputs, outputs=output, name=f'Student{self.config.student_arch.upper()}_InvestIQ')
+            self._compile(model)
         return model
 
+    # ─────────────────────────────────────────────────────────
+    # STREAMING INPUT PIPELINE
+    # ─────────────────────────────────────────────────────────
+    def write_scaled_features(self, df, symbol, chunk_rows=65536):
+        """
+        Fits the symbol's MinMaxScaler and writes the scaled feature matrix to
+        scaled_dir/{symbol}.npy in config.stream_dtype, both chunk by chunk, so
+        no step holds more than chunk_rows rows in memory.
+        Returns the matrix memory-mapped read-only, and the Close column index.
+        """
+        data, available = self._feature_matrix(df)
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        for start in range(0, len(data), chunk_rows):
+            scaler.partial_fit(data[start:start + chunk_rows])
+        self.scalers[symbol] = scaler
+
+        path = os.path.join(self.config.scaled_dir, f"{symbol}.npy")
+        out  = np.lib.format.open_memmap(path, mode='w+', dtype=self.config.stream_dtype,
+                                         shape=data.shape)
+        for start in range(0, len(data), chunk_rows):
+            out[start:start + chunk_rows] = scaler.transform(data[start:start + chunk_rows])
+        out.flush()
+        del out
+
+        close_idx = available.index('Close') if 'Close' in available else 0
+        return np.load(path, mmap_mode='r'), close_idx
+
+    def make_window_dataset(self, data, close_idx, starts, shuffle=False, symbol_ids=None):
+        """
+        tf.data pipeline of (X, y_scaled) batches equal to prepare_data's, cut
+        lazily from a (days, features) — typically memory-mapped — matrix:
+        only window start indices are shuffled and batched, and each batch's
+        windows are gathered (and cast to float32) when the batch is needed.
+        symbol_ids (aligned with starts) → ((X, symbol_id), y) batches for the
+        pooled model.
+        """
+        import tensorflow as tf
+
+        lw, pd_ = self.config.lookback_window, self.config.prediction_days
+        x_offsets = np.arange(lw)
+        y_offsets = lw + np.arange(pd_)
+
+        def gather(batch_starts):
+            X = data[batch_starts[:, None] + x_offsets]
+            y = data[batch_starts[:, None] + y_offsets, close_idx]
+            return X.astype(np.float32), y.astype(np.float32)
+
+        def load(batch_starts, batch_ids=None):
+            X, y = tf.numpy_function(gather, [batch_starts], (tf.float32, tf.float32))
+            X.set_shape((None, lw, data.shape[1]))
+            y.set_shape((None, pd_))
+            if batch_ids is None:
+                return X, y
+            return (X, tf.expand_dims(tf.cast(batch_ids, tf.int32), -1)), y
+
+        starts = np.asarray(starts, dtype=np.int64)
+        if symbol_ids is None:
+            ds = tf.data.Dataset.from_tensor_slices(starts)
+        else:
+            ds = tf.data.Dataset.from_tensor_slices((starts, np.asarray(symbol_ids, dtype=np.int32)))
+        if shuffle:
+            ds = ds.shuffle(min(len(starts), self.config.shuffle_buffer),
+                            reshuffle_each_iteration=True)
+        ds = ds.batch(self.config.batch_size)
+        return ds.map(load, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
     # ─────────────────────────────────────────────────────────
     # TRAINING
     # ─────────────────────────────────────────────────────────
-    def train_all_models(self, stock_data):
-        models, metrics = {}, {}
+    def checkpoints_dir(self):
+        return os.path.join(self.config.models_dir, "checkpoints")
+
+    def _callbacks(self, checkpoint_name=None):
+        """
+        Early stopping + LR schedule; with checkpoint_name, also a per-epoch
+        BackupAndRestore checkpoint so an interrupted fit resumes from its last
+        finished epoch (removed once the fit completes).
+        """
+        from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, BackupAndRestore
+
+        callbacks = [
+            EarlyStopping(
+                monitor='val_loss',
+                patience=self.config.early_stopping_patience,
+                restore_best_weights=True,
+                min_delta=1e-5
+            ),
+            ReduceLROnPlateau(
+                monitor='val_loss',
+                factor=0.5,
+                patience=self.config.lr_patience,
+                min_lr=1e-6,
+                verbose=0
+            )
+        ]
+        if checkpoint_name and self.config.epoch_checkpoints:
+            callbacks.append(BackupAndRestore(os.path.join(self.checkpoints_dir(), checkpoint_name)))
+        return callbacks
+
+    def _fit_inputs(self, df, symbol):
+        """
+        Returns (model.fit kwargs, sample count, input_shape) for one symbol,
+        split temporally by train_ratio; in-memory windows by default,
+        streaming tf.data pipelines with config.streaming_training.
+        """
+        lw = self.config.lookback_window
+        if self.config.streaming_training:
+            data, close_idx = self.write_scaled_features(df, symbol)
+            samples = max(0, len(data) - lw - self.config.prediction_days + 1)
+            split   = int(samples * self.config.train_ratio)
+            fit_kwargs = {
+                'x':               self.make_window_dataset(data, close_idx, np.arange(split), shuffle=True),
+                'validation_data': self.make_window_dataset(data, close_idx, np.arange(split, samples)),
+            }
+            return fit_kwargs, samples, (lw, data.shape[1])
+
+        X, y  = self.prepare_data(df, symbol=symbol, fit_scaler=True)
+        split = int(len(X) * self.config.train_ratio)
+        fit_kwargs = {
+            'x':               X[:split],
+            'y':               y[:split],
+            'validation_data': (X[split:], y[split:]),
+            'batch_size':      self.config.batch_size,
+        }
+        return fit_kwargs, len(X), (X.shape[1], X.shape[2])
+
+    def train_symbol(self, symbol, df, show_summary=False):
+        """Trains, saves and returns (model, metrics) for one symbol; None if it has too few sequences."""
+        fit_kwargs, samples, input_shape = self._fit_inputs(df, symbol)
+        if samples < 50:
+            print(f"[{symbol}] Not enough sequences ({samples}), skipping.")
+            return None
+
+        model = self.build_model(input_shape=input_shape)
+        if show_summary:
+            model.summary()
+
+        history = model.fit(
+            epochs=self.config.epochs,
+            callbacks=self._callbacks(checkpoint_name=symbol),
+            verbose=0,
+            **fit_kwargs
+        )
+
+        model_path = self.model_path(symbol)
+        model.save(model_path)
+        self.save_scaler(symbol)
+
+        metrics = {
+            'loss':     float(history.history['loss'][-1]),
+            'val_loss': float(history.history['val_loss'][-1]),
+            'mae':      float(history.history['mae'][-1])
+        }
+        print(f"[{symbol}] val_loss={metrics['val_loss']:.6f}  "
+              f"mae={metrics['mae']:.6f}")
+
+        now = datetime.now().isoformat(timespec='seconds')
+        self.save_training_meta(symbol, {
+            'last_full_train': now,
+            'last_trained':    now,
+            'val_loss':        metrics['val_loss'],
+            'lookback_window': input_shape[0],
+        })
+        self._export_after_training(model, model_path, df, symbol, metrics)
+        return model, metrics
+
+    def _export_after_training(self, model, model_path, df, symbol, metrics):
+        if self.config.export_tflite:
+            X, _ = self.prepare_data(df, symbol=symbol)
+            metrics['tflite_parity'] = self._export_tflite_checked(
+                model, model_path, [symbol], X[-self.config.tflite_parity_windows:]
+            )
+
+    def finetune_symbol(self, symbol, df):
+        """
+        incremental_training: warm-starts the saved model and scaler of symbol
+        and fine-tunes for finetune_epochs on the most recent
+        finetune_window_days windows of the training split. The held-out split
+        (after train_ratio, the windows the backtest scores) is never trained
+        on; it is the validation set, as in a full train. New bars reach the
+        training split as the split point moves forward with the data. The
+        scaler is kept, so the scaled space matches the saved model.
+
+        Returns (model, metrics), or None when a full retrain is due instead:
+        no saved model/metadata, the last full train is full_retrain_days old,
+        or fine-tuning raises the held-out val_loss by more than
+        finetune_max_degradation over the saved model's on the same windows
+        (the fine-tuned model is then discarded).
+        """
+        from tensorflow.keras.models import load_model
+
+        meta       = self.load_training_meta(symbol)
+        model_path = self.model_path(symbol)
+        if meta is None or not os.path.exists(model_path) or not self.scaler_store.has(symbol):
+            return None
+        age = (datetime.now() - datetime.fromisoformat(meta['last_full_train'])).days
+        if age >= self.config.full_retrain_days:
+            print(f"[{symbol}] Last full train {age} days ago — full retrain.")
+            return None
+
+        self.load_scaler(symbol)
+        X, y  = self.prepare_data(df, symbol=symbol, fit_scaler=False)
+        split = int(len(X) * self.config.train_ratio)
+        if split == 0 or split == len(X):
+            return None
+        start = max(0, split - self.config.finetune_window_days)
+
+        model = load_model(model_path, custom_objects=custom_objects())
+        if model.inputs[0].shape[1] != self.config.lookback_window:
+            print(f"[{symbol}] lookback_window changed since the last full train — full retrain.")
+            return None
+        X_val, y_val = X[split:], y[split:]
+        baseline, _  = model.evaluate(X_val, y_val, batch_size=self.config.batch_size, verbose=0)
+        history = model.fit(
+            X[start:split], y[start:split],
+            validation_data=(X_val, y_val),
+            epochs=self.config.finetune_epochs,
+            batch_size=self.config.batch_size,
+            verbose=0
+        )
+        val_loss = float(history.history['val_loss'][-1])
+        limit    = baseline * (1 + self.config.finetune_max_degradation)
+        if val_loss > limit:
+            print(f"[{symbol}] Fine-tuned val_loss {val_loss:.6f} > {limit:.6f} — full retrain.")
+            return None
+
+        model.save(model_path)
+        meta.update(last_trained=datetime.now().isoformat(timespec='seconds'), val_loss=val_loss)
+        self.save_training_meta(symbol, meta)
+
+        metrics = {
+            'loss':     float(history.history['loss'][-1]),
+            'val_loss': val_loss,
+            'mae':      float(history.history['mae'][-1]),
+            'mode':     'finetune'
+        }
+        print(f"[{symbol}] val_loss={metrics['val_loss']:.6f}  "
+              f"mae={metrics['mae']:.6f}  (fine-tuned)")
+        self._export_after_training(model, model_path, df, symbol, metrics)
+        return model, metrics
+
+    def for_symbol(self, symbol):
+        """
+        Trainer whose config carries symbol's tuned hyperparameters (written by
+        hparam_search), sharing this trainer's scalers; self when there are none.
+        """
+        params = self.load_hparams(symbol)
+        if not params:
+            return self
+        config = copy.copy(self.config)
+        vars(config).update(params)
+        trainer                 = LSTMModelTrainer(config, use_hparams=False)
+        trainer.scalers         = self.scalers
+        trainer.scaler_store    = self.scaler_store
+        trainer.persist_scalers = self.persist_scalers
+        return trainer
+
+    def fit_symbol(self, symbol, df, show_summary=False):
+        """
+        train_symbol with symbol's tuned hyperparameters, preceded by a
+        fine-tuning attempt under incremental_training.
+        """
+        trainer = self.for_symbol(symbol)
+        if trainer is not self:
+            return trainer.fit_symbol(symbol, df, show_summary=show_summary)
+        if self.config.incremental_training:
+            result = self.finetune_symbol(symbol, df)
+            if result is not None:
+                return result
+        return self.train_symbol(symbol, df, show_summary=show_summary)
+
+    def train_pooled_model(self, stock_data):
+        """
+        training_mode="pooled": a single build_pooled_model fit on the windows of
+        every symbol, each still scaled by its own MinMaxScaler and split
+        temporally by train_ratio. Windows are cut lazily from the concatenated
+        scaled feature matrices, so only (days, features) data is held in memory.
+        Saves one model plus pooled_symbols.json (embedding row order) and returns
+        the usual (models, metrics), every symbol mapping to the shared model.
+        """
+        lw, pd_ = self.config.lookback_window, self.config.prediction_days
+        blocks, symbols, train_parts, val_parts = [], [], [], []
+        offset = 0
 
         for symbol, df in stock_data.items():
+            data, available = self._feature_matrix(df)
+            samples = len(data) - lw - pd_ + 1
+            if available != FEATURES:
+                print(f"[{symbol}] Missing features, skipping.")
+                continue
+            if samples < 50:
+                print(f"[{symbol}] Not enough sequences ({max(samples, 0)}), skipping.")
+                continue
+            data  = self._scale(data, symbol, fit_scaler=True)
+            split = int(samples * self.config.train_ratio)
+            sid   = len(symbols)
+            train_parts.append((offset + np.arange(split), np.full(split, sid)))
+            val_parts.append((offset + np.arange(split, samples), np.full(samples - split, sid)))
+            blocks.append(data)
+            symbols.append(symbol)
+            offset += len(data)
+
+        if not symbols:
+            return {}, {}
+
+        matrix    = np.concatenate(blocks)
+        close_idx = FEATURES.index('Close')
+
+        def dataset(parts, shuffle=False):
+            return self.make_window_dataset(
+                matrix, close_idx,
+                np.concatenate([p[0] for p in parts]),
+                shuffle=shuffle,
+                symbol_ids=np.concatenate([p[1] for p in parts]),
+            )
+
+        model = self.build_pooled_model((lw, matrix.shape[1]), len(symbols))
+        model.summary()
+        history = model.fit(
+            dataset(train_parts, shuffle=True),
+            validation_data=dataset(val_parts),
+            epochs=self.config.epochs,
+            callbacks=self._callbacks(checkpoint_name="pooled"),
+            verbose=0
+        )
+
+        model.save(self.pooled_model_path())
+        with open(self.pooled_symbols_path(), 'w', encoding='utf-8') as f:
+            json.dump(symbols, f)
+        self.save_scalers(symbols)
+
+        parity = None
+        if self.config.export_tflite:
+            # One window per symbol: the last lookback_window days of each block
+            ends   = np.cumsum([len(b) for b in blocks])
+            X      = np.stack([matrix[end - lw:end] for end in ends])[-self.config.tflite_parity_windows:]
+            ids    = np.arange(len(symbols), dtype=np.int32)[-len(X):, np.newaxis]
+            parity = self._export_tflite_checked(model, self.pooled_model_path(), symbols, X, ids)
+        models, metrics = {}, {}
+        for sid, symbol in enumerate(symbols):
+            val_loss, _ = model.evaluate(dataset([val_parts[sid]]), verbose=0)
+            models[symbol]  = model
+            metrics[symbol] = {
+                'loss':     float(history.history['loss'][-1]),
+                'val_loss': float(val_loss),
+                'mae':      float(history.history['mae'][-1])
+            }
+            if parity is not None:
+                metrics[symbol]['tflite_parity'] = parity
+            print(f"[{symbol}] val_loss={metrics[symbol]['val_loss']:.6f}  "
+                  f"mae={metrics[symbol]['mae']:.6f}  (pooled)")
+        return models, metrics
+
+    def _core_blocks(self, workers):
+        """Splits the CPUs this process may use into one contiguous block per worker."""
+        if hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+        if len(cpus) < workers:
+            return [[] for _ in range(workers)]
+        return [[int(c) for c in block] for block in np.array_split(cpus, workers)]
+
+    def train_parallel(self, stock_data, manifest):
+        """
+        training_workers > 1: per-symbol training spread over a spawn-based
+        process pool. Each worker is pinned to its own block of cores with
+        matching intra-op / inter-op thread budgets; metrics, model paths and
+        scalers come back to this process and the saved models are reloaded,
+        so the return shape matches the sequential path. Each symbol is
+        recorded in manifest as soon as its worker finishes.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from tensorflow.keras.models import load_model
+
+        workers = min(self.config.training_workers, len(stock_data))
+        ctx     = multiprocessing.get_context('spawn')   # TF is not fork-safe
+        blocks  = ctx.Queue()
+        for block in self._core_blocks(workers):
+            blocks.put(block)
+
+        models, metrics = {}, {}
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx,
+            initializer=_init_training_worker,
+            initargs=(blocks, self.config.intra_op_threads, self.config.inter_op_threads),
+        ) as pool:
+            futures = {pool.submit(_train_symbol_worker, self.config, symbol, df): symbol
+                       for symbol, df in stock_data.items()}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    result = future.result()
+                    if result is None:
+                        manifest.mark_skipped(symbol)
+                        continue
+                    self.scalers[symbol] = result['scaler']
+                    self.save_scaler(symbol)
+                    models[symbol]  = load_model(result['model_path'], custom_objects=custom_objects())
+                    metrics[symbol] = result['metrics']
+                    manifest.mark_done(symbol, metrics[symbol])
+                except Exception as ex:
+                    print(f"[{symbol}] Training failed: {ex}")
+                    manifest.mark_failed(symbol, f"{type(ex).__name__}: {ex}")
+
+        return models, metrics
+
+    def run_manifest_path(self):
+        return os.path.join(self.config.models_dir, "training_run.json")
+
+    def _load_completed(self, manifest, symbols):
+        """(models, metrics) of the symbols manifest already finished, loaded from disk."""
+        from tensorflow.keras.models import load_model
+
+        models, metrics = {}, {}
+        loaded = {}   # model path → model; a pooled model is shared
+        for symbol, symbol_metrics in manifest.done().items():
+            if symbol not in symbols:
+                continue
+            path = self.model_path(symbol)
             try:
-                X, y = self.prepare_data(df, symbol=symbol, fit_scaler=True)
+                if path not in loaded:
+                    loaded[path] = load_model(path, custom_objects=custom_objects())
+                self.load_scaler(symbol)
+            except Exception as ex:
+                print(f"[{symbol}] Completed model could not be loaded ({ex}); retraining.")
+                continue
+            models[symbol], metrics[symbol] = loaded[path], symbol_metrics
+        return models, metrics
 
-                if len(X) < 50:
-                    print(f"[{symbol}] Not enough sequences ({len(X)}), skipping.")
-                    continue
+    def train_all_models(self, stock_data, resume=False):
+        """
+        Trains every symbol (per training_mode / training_workers) → (models, metrics).
+        Progress goes to the run manifest (training_run.py): resume=True
+        continues an interrupted run, reloading the symbols it finished and
+        resuming the in-progress fit from its per-epoch checkpoint. Failures are
+        recorded in the manifest with their error rather than only printed.
+        """
+        manifest = RunManifest.open(self.run_manifest_path(), resume=resume)
+        self.last_run = manifest
+        if not manifest.resumed:
+            # New run: per-epoch checkpoints of an abandoned run must not leak in. A resumed
+            # run keeps them, even before its first symbol finished — that fit continues from them.
+            shutil.rmtree(self.checkpoints_dir(), ignore_errors=True)
 
-                split          = int(len(X) * self.config.train_ratio)
-                X_train, X_val = X[:split],  X[split:]
-                y_train, y_val = y[:split],  y[split:]
-
-                model = self.build_model(
-                    input_shape=(X_train.shape[1], X_train.shape[2])
-                )
-
-                if not models:
-                    model.summary()
-
-                callbacks = [
-                    EarlyStopping(
-                        monitor='val_loss',
-                        patience=self.config.early_stopping_patience,
-                        restore_best_weights=True,
-                        min_delta=1e-5
-                    ),
-                    ReduceLROnPlateau(
-                        monitor='val_loss',
-                        factor=0.5,
-                        patience=self.config.lr_patience,
-                        min_lr=1e-6,
-                        verbose=0
-                    )
-                ]
-
-                history = model.fit(
-                    X_train, y_train,
-                    validation_data=(X_val, y_val),
-                    epochs=self.config.epochs,
-                    batch_size=self.config.batch_size,
-                    callbacks=callbacks,
-                    verbose=0
-                )
-
-                model_path = f"{self.config.models_dir}/{symbol}_lstm_model.keras"
-                model.save(model_path)
-                self.save_scaler(symbol)
-
-                models[symbol]  = model
-                metrics[symbol] = {
-                    'loss':     float(history.history['loss'][-1]),
-                    'val_loss': float(history.history['val_loss'][-1]),
-                    'mae':      float(history.history['mae'][-1])
-                }
-                print(f"[{symbol}] val_loss={metrics[symbol]['val_loss']:.6f}  "
-                      f"mae={metrics[symbol]['mae']:.6f}")
+        models, metrics = self._load_completed(manifest, stock_data)
+        pending = {s: df for s, df in stock_data.items()
+                   if s not in models and s not in manifest.settled()}
 
+        if not pending:
+            pass
+        elif self.config.training_mode == "pooled":
+            # One shared model: any pending symbol means the pooled fit (re)runs
+            try:
+                models, metrics = self.train_pooled_model(stock_data)
+                for symbol in stock_data:
+                    if symbol in metrics:
+                        manifest.mark_done(symbol, metrics[symbol])
+                    else:
+                        manifest.mark_skipped(symbol)
             except Exception as ex:
-                print(f"[{symbol}] Training failed: {ex}")
+                traceback.print_exc()
+                for symbol in pending:
+                    manifest.mark_failed(symbol, f"{type(ex).__name__}: {ex}")
+        elif self.config.training_workers > 1 and len(pending) > 1:
+            new_models, new_metrics = self.train_parallel(pending, manifest)
+            models.update(new_models)
+            metrics.update(new_metrics)
+        else:
+            for symbol, df in pending.items():
+                try:
+                    result = self.fit_symbol(symbol, df, show_summary=not models)
+                    if result is None:
+                        manifest.mark_skipped(symbol)
+                        continue
+                    models[symbol], metrics[symbol] = result
+                    manifest.mark_done(symbol, metrics[symbol])
+                except Exception as ex:
+                    print(f"[{symbol}] Training failed: {ex}")
+                    manifest.mark_failed(symbol, f"{type(ex).__name__}: {ex}")
 
+        if not manifest.failed():
+            manifest.finish()
         return models, metrics
 
+    # ─────────────────────────────────────────────────────────
+    # TFLITE EXPORT
+    # ─────────────────────────────────────────────────────────
+    def tflite_path(self, keras_path, variant):
+        return keras_path.replace('.keras', f'.{variant}.tflite')
+
+    def export_tflite(self, model, keras_path):
+        """
+        Converts model to one .tflite file per TFLITE_VARIANTS entry, next to
+        its .keras artifact; returns {variant: path}. The graph is re-traced
+        with a static batch of 1, which lets the LSTM loops and the custom
+        attention layers lower to TFLite builtin ops (no Flex delegate needed).
+        """
+        import keras
+        import tensorflow as tf
+        from tensorflow.keras.layers import Input
+        from tensorflow.keras.models import Model
+
+        if any(layer.compute_dtype != 'float32' for layer in model.layers):
+            # bfloat16 LSTM loops do not lower to TFLite: export a float32 twin with the same
+            # weights. Sub-layers built inside custom layers follow the global policy.
+            policy = keras.mixed_precision.global_policy()
+            keras.mixed_precision.set_global_policy('float32')
+            try:
+                twin = type(model).from_config(_float32_config(model.get_config()),
+                                               custom_objects=custom_objects())
+            finally:
+                keras.mixed_precision.set_global_policy(policy)
+            twin.set_weights(model.get_weights())
+            model = twin
+        inputs = [Input(shape=t.shape[1:], batch_size=1, dtype=t.dtype) for t in model.inputs]
+        fixed  = Model(inputs, model(inputs if len(inputs) > 1 else inputs[0]))
+        paths  = {}
+        for variant in TFLITE_VARIANTS:
+            converter = tf.lite.TFLiteConverter.from_keras_model(fixed)
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            if variant == 'float16':
+                converter.target_spec.supported_types = [tf.float16]
+            paths[variant] = self.tflite_path(keras_path, variant)
+            with open(paths[variant], 'wb') as f:
+                f.write(converter.convert())
+        return paths
+
+    def check_tflite_parity(self, model, paths, X, ids=None):
+        """Max |Keras − TFLite| over the windows X in scaled space → {variant: error}."""
+        inputs    = X if ids is None else [X, ids]
+        reference = np.asarray(model(inputs, training=False))
+        return {variant: float(np.abs(TFLiteForecaster(path)(inputs) - reference).max())
+                for variant, path in paths.items()}
+
+    def _export_tflite_checked(self, model, keras_path, symbols, X, ids=None):
+        """
+        export_tflite + check_tflite_parity; records keras_path and the scalers
+        of symbols as the provenance of every variant (see serving_path).
+        """
+        paths  = self.export_tflite(model, keras_path)
+        parity = self.check_tflite_parity(model, paths, X, ids)
+        for path in paths.values():
+            self.write_provenance(path, keras_path, symbols)
+        print("  TFLite parity (max abs error, scaled): " +
+              "  ".join(f"{v}={e:.2e}" for v, e in parity.items()))
+        return parity
+
+    # ─────────────────────────────────────────────────────────
+    # DERIVED ARTIFACT PROVENANCE
+    # ─────────────────────────────────────────────────────────
+    # A TFLite export works in the scaled space of the .keras model it was
+    # converted from, a distilled student in that of its teacher. The
+    # {artifact}.json sidecar records that source's (mtime_ns, size) and the
+    # scaler versions it was built against, so a retrain or fine-tune that
+    # does not re-export / re-distill leaves it stale instead of served with
+    # the new scaler.
+    def provenance_path(self, artifact):
+        return f"{artifact}.json"
+
+    def _scaler_version(self, symbol):
+        try:
+            return self.scaler_store.version(symbol)
+        except FileNotFoundError:
+            return None
+
+    def write_provenance(self, artifact, source, symbols):
+        st = os.stat(source)
+        with open(self.provenance_path(artifact), 'w', encoding='utf-8') as f:
+            json.dump({
+                'source':  os.path.basename(source),
+                'stamp':   [st.st_mtime_ns, st.st_size],
+                'scalers': {s: self._scaler_version(s) for s in symbols},
+            }, f, indent=2)
+
+    def _read_provenance(self, artifact):
+        """Sidecar of artifact, or None; re-read only when the file changes."""
+        path = self.provenance_path(artifact)
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._provenance.get(artifact)
+        if cached is None or cached[0] != stamp:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    cached = (stamp, json.load(f))
+            except (OSError, ValueError):
+                return None
+            self._provenance[artifact] = cached
+        return cached[1]
+
+    def is_current(self, artifact, source, symbol):
+        """
+        True when artifact exists and was derived from source as it is on disk
+        now, with symbol's current scaler.
+        """
+        provenance = self._read_provenance(artifact)
+        if provenance is None or not os.path.exists(artifact):
+            return False
+        try:
+            st = os.stat(source)
+        except OSError:
+            return False
+        version = self._scaler_version(symbol)
+        return (provenance.get('stamp') == [st.st_mtime_ns, st.st_size]
+                and version is not None and provenance.get('scalers', {}).get(symbol) == version)
+
+    # ─────────────────────────────────────────────────────────
+    # INFERENCE
+    # ─────────────────────────────────────────────────────────
+    def pooled_model_path(self):
+        return os.path.join(self.config.models_dir, "pooled_lstm_model.keras")
+
+    def pooled_symbols_path(self):
+        return os.path.join(self.config.models_dir, "pooled_symbols.json")
+
+    def pooled_symbols(self):
+        """Symbols of the pooled model, in embedding-row order; re-read only when the file changes."""
+        path  = self.pooled_symbols_path()
+        stamp = os.stat(path).st_mtime_ns
+        if self._pooled_symbols is None or self._pooled_symbols[0] != stamp:
+            with open(path, encoding='utf-8') as f:
+                self._pooled_symbols = (stamp, json.load(f))
+        return self._pooled_symbols[1]
+
+    def model_path(self, symbol):
+        """Model artifact that forecasts symbol under config.training_mode."""
+        if self.config.training_mode == "pooled":
+            return self.pooled_model_path()
+        return f"{self.config.models_dir}/{symbol}_lstm_model.keras"
+
+    def student_path(self, symbol):
+        """Distilled student of symbol (per symbol in both training modes)."""
+        return f"{self.config.models_dir}/{symbol}_student.keras"
+
+    def training_meta_path(self, symbol):
+        return f"{self.config.models_dir}/{symbol}_lstm_model.meta.json"
+
+    def load_training_meta(self, symbol):
+        """Training metadata of symbol's saved model, or None if there is none."""
+        path = self.training_meta_path(symbol)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_training_meta(self, symbol, meta):
+        with open(self.training_meta_path(symbol), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def hparams_path(self, symbol):
+        return f"{self.config.models_dir}/{symbol}_hparams.json"
+
+    def load_hparams(self, symbol):
+        """Tuned config overrides for symbol ({} if none); re-read only when the file changes."""
+        if not self.use_hparams or not symbol or self.config.training_mode == "pooled":
+            return {}
+        path = self.hparams_path(symbol)
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        cached = self._hparams.get(symbol)
+        if cached is None or cached[0] != stamp:
+            with open(path, encoding='utf-8') as f:
+                cached = (stamp, json.load(f)['params'])
+            self._hparams[symbol] = cached
+        return cached[1]
+
+    def lookback_window(self, symbol=None):
+        """
+        Window length symbol's saved model was built for, as recorded in its
+        training metadata; config.lookback_window without one (pooled mode, no
+        trained model yet). A tuned lookback therefore only reaches inference
+        once a retrain has built a model for it. Re-read only when the file
+        changes (and not at all while pinned).
+        """
+        if not symbol or self.config.training_mode == "pooled":
+            return self.config.lookback_window
+        if self.pinned and symbol in self._lookbacks:
+            return self._lookbacks[symbol][1]
+        path = self.training_meta_path(symbol)
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except OSError:
+            return self.config.lookback_window
+        cached = self._lookbacks.get(symbol)
+        if cached is None or cached[0] != stamp:
+            meta   = self.load_training_meta(symbol) or {}
+            cached = (stamp, meta.get('lookback_window', self.config.lookback_window))
+            self._lookbacks[symbol] = cached
+        return cached[1]
+
+    def serving_path(self, symbol):
+        """
+        Artifact served for symbol: the .keras model, or with
+        serving_runtime="tflite" its exported variant while that is current
+        (is_current: exported from the .keras file on disk, with the current
+        scaler); a missing or stale export falls back to the .keras model.
+        With serving_model="student", the distilled student while it is
+        current for the teacher on disk (symbols without one, or whose teacher
+        was retrained since, are served by the teacher).
+        """
+        path = self.model_path(symbol)
+        student = self.student_path(symbol)
+        if self.config.serving_model == "student" and self.is_current(student, path, symbol):
+            path = student
+        if self.config.serving_runtime == "tflite":
+            exported = self.tflite_path(path, self.config.tflite_variant)
+            if self.is_current(exported, path, symbol):
+                return exported
+        return path
+
+    def predict_scaled(self, model, symbol, X):
+        """
+        model.predict for a per-symbol or pooled model → (samples, prediction_days)
+        in scaled space. Raises KeyError if a pooled model was not trained on symbol.
+        """
+        model = self._inference_model(model)
+        if len(model.inputs) == 2:
+            symbols = self.pooled_symbols()
+            if symbol not in symbols:
+                raise KeyError(f"{symbol} is not part of the pooled model")
+            ids = np.full((len(X), 1), symbols.index(symbol), dtype=np.int32)
+            return model.predict([X, ids], verbose=0)
+        return model.predict(X, verbose=0)
+
+    def _inference_model(self, model):
+        """Applies config.jit_compile to a (loaded) Keras model's predict step."""
+        if self.config.jit_compile and not isinstance(model, TFLiteForecaster) and not model.jit_compile:
+            model.jit_compile      = True
+            model.predict_function = None   # rebuilt with XLA on next use
+        return model
+
+    def predict_batch(self, models, windows):
+        """
+        Forecasts many symbols with one forward pass per distinct model.
+
+        models  : {symbol: model} — symbols that share a model (pooled mode)
+                  are stacked into a single batch
+        windows : {symbol: prepare_last_window(...)}  (1, lookback_window, NUM_FEATURES)
+        Returns {symbol: (prediction_days,) scaled forecast}. Symbols a pooled
+        model was not trained on are left out.
+
+        Uses predict_on_batch, a single compiled step (XLA with
+        config.jit_compile), rather than model.predict, which builds a dataset
+        and callback machinery on every call.
+        """
+        groups = {}
+        for symbol in windows:
+            groups.setdefault(id(models[symbol]), []).append(symbol)
+
+        forecasts = {}
+        for symbols in groups.values():
+            model = self._inference_model(models[symbols[0]])
+            if len(model.inputs) == 2:
+                known   = self.pooled_symbols()
+                symbols = [s for s in symbols if s in known]
+                if not symbols:
+                    continue
+                X    = np.concatenate([windows[s] for s in symbols])
+                ids  = np.array([[known.index(s)] for s in symbols], dtype=np.int32)
+                pred = model.predict_on_batch([X, ids])
+            else:
+                X    = np.concatenate([windows[s] for s in symbols])
+                pred = model.predict_on_batch(X)
+            forecasts.update(zip(symbols, np.asarray(pred)))
+        return forecasts
+
     # ─────────────────────────────────────────────────────────
     # SCALER PERSISTENCE
     # ─────────────────────────────────────────────────────────
+    # All symbols share scalers_dir/scalers.npz (see scaler_store.py)
+    def save_scalers(self, symbols):
+        if self.persist_scalers:
+            self.scaler_store.put_many({s: self.scalers[s] for s in symbols if s in self.scalers})
+
     def save_scaler(self, symbol):
-        if symbol in self.scalers:
-            path = os.path.join(self.config.scalers_dir, f"{symbol}_scaler.pkl")
-            joblib.dump(self.scalers[symbol], path)
+        self.save_scalers([symbol])
 
     def load_scaler(self, symbol):
-        path = os.path.join(self.config.scalers_dir, f"{symbol}_scaler.pkl")
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Scaler not found for {symbol}: {path}")
-        self.scalers[symbol] = joblib.load(path)
-        return self.scalers[symbol]
+        scaler = self.scaler_store.get(symbol)
+        if scaler is None:
+            raise FileNotFoundError(f"Scaler not found for {symbol} in {self.scaler_store.path}")
+        self.scalers[symbol] = scaler
+        return scaler
 
     # ─────────────────────────────────────────────────────────
     # INVERSE TRANSFORM
     # ─────────────────────────────────────────────────────────
     def inverse_transform_close(self, symbol, scaled_values):
         """Converts scaled Close predictions back to rupee prices."""
-        if symbol not in self.scalers:
-            self.load_scaler(symbol)
-        scaler    = self.scalers[symbol]
-        flat      = np.array(scaled_values).flatten()
-        dummy     = np.zeros((len(flat), scaler.n_features_in_), dtype=np.float32)
-        dummy[:, 0] = flat   # Close is index 0
-        return scaler.inverse_transform(dummy)[:, 0]
+        flat = np.ravel(scaled_values)
+        return self.inverse_transform_close_many([symbol], flat[np.newaxis])[0]
+
+    def _close_affine(self, symbols):
+        """(min, scale) of the Close column (index 0) per symbol, as (len(symbols), 1) columns."""
+        for symbol in symbols:
+            if symbol not in self.scalers:
+                self.load_scaler(symbol)
+        mins   = np.array([self.scalers[s].min_[0]   for s in symbols])[:, np.newaxis]
+        scales = np.array([self.scalers[s].scale_[0] for s in symbols])[:, np.newaxis]
+        return mins, scales
+
+    def inverse_transform_close_many(self, symbols, scaled_values):
+        """
+        inverse_transform_close for several symbols at once: row i of
+        scaled_values (symbols, days) is unscaled with the Close column of
+        symbols[i]'s scaler — a direct affine step in the same float32
+        arithmetic as MinMaxScaler.inverse_transform.
+        """
+        mins, scales = self._close_affine(symbols)
+        prices  = np.array(scaled_values, dtype=np.float32).reshape(len(symbols), -1)
+        prices -= mins
+        prices /= scales
+        return prices
+
+    def transform_close_many(self, symbols, prices):
+        """Inverse of inverse_transform_close_many: rupee Close prices → scaled space."""
+        mins, scales = self._close_affine(symbols)
+        scaled  = np.array(prices, dtype=np.float32).reshape(len(symbols), -1)
+        scaled *= scales
+        scaled += mins
+        return scaled
 
     # ─────────────────────────────────────────────────────────
     # LEGACY HELPERS
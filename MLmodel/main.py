@@ -6,8 +6,10 @@ CLI entry point for the InvestIQ ML pipeline.
 Run order:
     1. python seed_database.py       # one-time DB seeding
     2. python main.py                # train LSTM + recommender, then evaluate
+       python main.py --resume       # continue an interrupted training run
 """
 
+import argparse
 import logging
 import os
 from datetime import datetime
@@ -15,8 +17,12 @@ from datetime import datetime
 from config import Config
 from data_collector import StockDataCollector
 from lstm_model import LSTMModelTrainer
+from model_registry import ModelRegistry
+from forecast_store import ForecastStore
+from distillation import Distiller
 from portfolio_recommender import PortfolioRecommender
 from evaluate import run_evaluation
+from backtest import WalkForwardBacktester
 
 
 def setup_logging():
@@ -36,12 +42,18 @@ def setup_logging():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="InvestIQ ML pipeline")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last unfinished training run instead of starting over")
+    args = parser.parse_args()
+
     logger = setup_logging()
     logger.info("==== Starting InvestIQ ML Pipeline ====")
 
     config      = Config()
     collector   = StockDataCollector(config)
     trainer     = LSTMModelTrainer(config)
+    registry    = ModelRegistry(trainer, config.model_cache_size)   # shared, so no model is loaded twice
     recommender = PortfolioRecommender(config)
 
     # ── 1. Fetch market data ───────────────────────────────────────────────────
@@ -50,9 +62,29 @@ def main():
     logger.info("Stock data loaded for %d stocks.", len(stock_data))
 
     # ── 2. Train LSTM models ───────────────────────────────────────────────────
+    # Features are read back memory-mapped from the columnar feature store
     logger.info("Training LSTM models...")
-    models, metrics = trainer.train_all_models(stock_data)
+    features = collector.store.load_all(stock_data)
+    models, metrics = trainer.train_all_models(features, resume=args.resume)
     logger.info("Trained %d models.", len(models))
+    failed = trainer.last_run.failed()
+    if failed:
+        logger.warning("Training failed for %d stocks: %s", len(failed), failed)
+
+    # ── 2a. Distil compact students (served with serving_model="student") ──────
+    if config.distill_students:
+        logger.info("Distilling student models...")
+        report = Distiller(config).distill_all(features, models)
+        logger.info("Distilled %d students: %s", len(report["symbols"]), report.get("median"))
+
+    # ── 2b. Precompute forecasts served by /predict ────────────────────────────
+    if config.precompute_forecasts:
+        logger.info("Precomputing forecasts...")
+        versions = {s: entry["version"] for s, entry in collector.store.index().items()}
+        written  = ForecastStore(config.forecasts_db_path).precompute(
+            trainer, registry, stock_data, versions
+        )
+        logger.info("Precomputed forecasts for %d stocks.", len(written))
 
     # ── 3. Train recommender from private DB ───────────────────────────────────
     # seed_database.py must be run first to populate investiq_profiles.db.
@@ -63,9 +95,16 @@ def main():
 
     # ── 4. Evaluate ───────────────────────────────────────────────────────────
     logger.info("Evaluating LSTM models...")
-    eval_report = run_evaluation(config)
+    # Reuses the fetched data, the trained models and the trainer's loaded scalers
+    versions    = {s: entry["version"] for s, entry in collector.store.index().items()}
+    eval_report = run_evaluation(config, stock_data=stock_data, models=models,
+                                 data_versions=versions, trainer=trainer, registry=registry)
     logger.info("Evaluation complete: %s", eval_report)
 
+    logger.info("Walk-forward backtest over all horizons...")
+    backtest = WalkForwardBacktester(config, trainer, registry).run(stock_data, models=models)
+    logger.info("Backtested %d stocks in %ss.", len(backtest["symbols"]), backtest["seconds"])
+
     logger.info("==== InvestIQ ML Pipeline Complete! ====")
 
 
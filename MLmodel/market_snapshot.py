@@ -0,0 +1,95 @@
+"""
+market_snapshot.py
+------------------
+Process-wide market data for the API.
+
+MarketSnapshot loads stock_data once at startup and refreshes it in a
+background thread every snapshot_ttl_seconds, so request handlers read
+already-engineered features instead of fetching the universe per request.
+Each refresh swaps in a new immutable SnapshotState; a handler that reads
+current() once sees one consistent (stock_data, version, as_of) triple even
+while a refresh is running. on_refresh callbacks run with every new state,
+after it has been swapped in.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+
+SnapshotState = namedtuple("SnapshotState",
+                           ["stock_data", "version", "as_of", "loaded_at", "symbol_versions"])
+
+EMPTY_STATE = SnapshotState({}, None, None, None, {})
+
+
+class MarketSnapshot:
+    def __init__(self, collector, ttl_seconds, on_refresh=None):
+        self.collector     = collector
+        self.ttl_seconds   = ttl_seconds
+        self.on_refresh    = list(on_refresh or [])
+        self.logger        = logging.getLogger(__name__)
+        self._state        = EMPTY_STATE
+        self._refresh_lock = threading.Lock()   # one fetch at a time
+        self._stop         = threading.Event()
+        self._thread       = None
+
+    def current(self):
+        return self._state
+
+    def _symbol_versions(self, stock_data):
+        """Feature-store version of every symbol in the snapshot."""
+        index = self.collector.store.index()
+        return {s: index.get(s, {}).get("version") for s in stock_data}
+
+    def _version(self, symbol_versions):
+        """Digest of the feature-store versions of every symbol in the snapshot."""
+        parts = [f"{s}:{symbol_versions[s]}" for s in sorted(symbol_versions)]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+    def refresh(self):
+        """Fetches the universe and swaps it in; keeps the previous state if nothing came back."""
+        with self._refresh_lock:
+            stock_data = self.collector.fetch_all_stocks()
+            if not stock_data:
+                self.logger.warning("Snapshot refresh returned no stock data; keeping previous snapshot.")
+                return self._state
+            as_of    = max(df["Date"].iloc[-1] for df in stock_data.values())
+            versions = self._symbol_versions(stock_data)
+            self._state = SnapshotState(
+                stock_data=stock_data,
+                version=self._version(versions),
+                as_of=str(as_of.date()),
+                loaded_at=datetime.now().isoformat(timespec="seconds"),
+                symbol_versions=versions,
+            )
+            self.logger.info("Market snapshot %s loaded (%d symbols, as of %s).",
+                             self._state.version, len(stock_data), self._state.as_of)
+            for callback in self.on_refresh:
+                try:
+                    callback(self._state)
+                except Exception:
+                    self.logger.exception("Snapshot refresh callback failed")
+            return self._state
+
+    def _run(self):
+        while not self._stop.wait(self.ttl_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                self.logger.exception("Background snapshot refresh failed")
+
+    def start(self):
+        """Loads the first snapshot synchronously, then refreshes in the background."""
+        try:
+            self.refresh()
+        except Exception:
+            self.logger.exception("Initial snapshot load failed")
+        if self.ttl_seconds and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="market-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,161 @@
+"""
+model_registry.py
+-----------------
+In-memory cache of trained forecasting models and their scalers.
+
+Loading a .keras model rebuilds the graph and deserialises the custom
+attention layers, which takes seconds; ModelRegistry does it once per
+artifact and keeps the result behind a size-bounded LRU, so repeat
+predictions for a symbol only cost a stat() of the artifact files.
+
+Models are keyed by artifact path and stamped with the file's
+(mtime_ns, size); scalers by the digest of their row in the scaler store.
+When a retrain rewrites a model or scaler the stamp no longer matches and
+the next lookup reloads it. A pooled model is a single
+artifact shared by every symbol, so it occupies one slot. With
+serving_runtime="tflite" the registry holds TFLiteForecaster instances of the
+exported variant instead of Keras models.
+
+While a training run rewrites artifacts, hold() keeps serving the model,
+scaler and window length each symbol was last served with, so no request
+pairs a new model with an old scaler (or the reverse) halfway through the run.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from lstm_model import TFLiteForecaster, custom_objects
+except ImportError:
+    from MLmodel.lstm_model import TFLiteForecaster, custom_objects
+
+
+def _stamp(path):
+    """Version of an artifact on disk; raises FileNotFoundError if it is missing."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ModelRegistry:
+    def __init__(self, trainer, capacity):
+        self.trainer  = trainer
+        self.capacity = max(1, capacity)
+        self.logger   = logging.getLogger(__name__)
+        self._models  = OrderedDict()   # model path → (stamp, model), least recently used first
+        self._scalers = {}              # symbol → version of the scaler in trainer.scalers
+        self._served  = {}              # symbol → model path it was last served from
+        self._held    = False
+        self._lock    = threading.Lock()
+
+    def _model(self, path):
+        stamp = _stamp(path)
+        entry = self._models.get(path)
+        if entry is not None and entry[0] == stamp:
+            self._models.move_to_end(path)
+            return entry[1]
+
+        if path.endswith('.tflite'):
+            model = TFLiteForecaster(path)
+        else:
+            from tensorflow.keras.models import load_model
+            model = load_model(path, custom_objects=custom_objects())
+        self._models[path] = (stamp, model)
+        self._models.move_to_end(path)
+        while len(self._models) > self.capacity:
+            evicted, _ = self._models.popitem(last=False)
+            self.logger.info("Model registry evicted %s", evicted)
+        return model
+
+    def _scaler(self, symbol):
+        version = self.trainer.scaler_store.version(symbol)
+        if self._scalers.get(symbol) != version or symbol not in self.trainer.scalers:
+            self.trainer.load_scaler(symbol)
+            self._scalers[symbol] = version
+        return self.trainer.scalers[symbol]
+
+    def _held_path(self, symbol):
+        """Model path symbol is pinned to while held (None when not held or not loaded)."""
+        path = self._served.get(symbol) if self._held else None
+        if path in self._models and symbol in self._scalers and symbol in self.trainer.scalers:
+            return path
+        return None
+
+    def version(self, symbol, path=None):
+        """
+        Version of the model + scaler that forecast symbol; changes whenever a
+        retrain rewrites either. Raises FileNotFoundError if one is missing.
+        path: model artifact to version instead of the served one.
+        """
+        if path is None:
+            with self._lock:
+                held = self._held_path(symbol)
+                if held is not None:
+                    stamps = self._models[held][0] + (self._scalers[symbol],)
+                    return hashlib.sha1(repr(stamps).encode()).hexdigest()[:12]
+        stamps = _stamp(path or self.trainer.serving_path(symbol)) + (self.trainer.scaler_store.version(symbol),)
+        return hashlib.sha1(repr(stamps).encode()).hexdigest()[:12]
+
+    def get(self, symbol):
+        """
+        Model that forecasts symbol, with its scaler installed in
+        trainer.scalers. Raises FileNotFoundError if either artifact is missing.
+        """
+        with self._lock:
+            held = self._held_path(symbol)
+            if held is not None:
+                self._models.move_to_end(held)
+                return self._models[held][1]
+            path  = self.trainer.serving_path(symbol)
+            model = self._model(path)
+            self._scaler(symbol)
+            self.trainer.lookback_window(symbol)   # cached, so hold() pins it too
+            self._served[symbol] = path
+            return model
+
+    @contextmanager
+    def hold(self):
+        """
+        Serves every symbol from the model, scaler and window length it was
+        last served with, ignoring artifacts rewritten on disk meanwhile (a
+        training run in progress). Symbols not loaded yet are read from disk.
+        On exit everything is dropped, so the next lookup loads the finished
+        artifacts together.
+        """
+        with self._lock:
+            self._held = self.trainer.pinned = True
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._held = self.trainer.pinned = False
+            self.invalidate()
+
+    def preload(self, symbols):
+        """Loads every available artifact up front; returns the symbols now warm."""
+        warm = []
+        for symbol in symbols:
+            try:
+                self.get(symbol)
+                warm.append(symbol)
+            except FileNotFoundError:
+                continue
+            except Exception:
+                self.logger.exception("Preloading model for %s failed", symbol)
+        self.logger.info("Model registry preloaded %d/%d symbols", len(warm), len(symbols))
+        return warm
+
+    def invalidate(self, symbol=None):
+        """Drops the cached entries of symbol (or everything)."""
+        with self._lock:
+            if symbol is None:
+                self._models.clear()
+                self._scalers.clear()
+                self._served.clear()
+                return
+            self._models.pop(self.trainer.serving_path(symbol), None)
+            self._scalers.pop(symbol, None)
+            self._served.pop(symbol, None)
@@ -26,9 +26,13 @@ import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-from tensorflow.keras.callbacks import EarlyStopping
-from tensorflow.keras.layers import Dense, Dropout, Input, BatchNormalization
-from tensorflow.keras.models import Sequential, load_model
+# TensorFlow is imported by the methods that build, train or load the model,
+# so importing this module (the API at startup) does not load it.
+
+try:
+    from data_providers import synthetic_sector_map
+except ImportError:
+    from MLmodel.data_providers import synthetic_sector_map
 
 # ---------------------------------------------------------------------------
 # Full vocabulary — keep in sync with seed_database.py and AIAdvisorForm.tsx
@@ -140,6 +144,7 @@ def compute_utility_score(
     risk_tolerance: str,
     primary_goal: str,
     preferred_sectors: list,
+    sector_map: dict = None,
 ) -> float:
     """
     Computes a user-specific utility score for a stock.
@@ -153,6 +158,8 @@ def compute_utility_score(
       2. Penalty for volatility scaled by risk tolerance
       3. Bonus if stock is in a preferred sector
       4. Goal-specific weighting of return vs stability
+
+    sector_map defaults to STOCK_SECTOR_MAP.
     """
     ann_return  = mean_ret * 252           # annualised daily mean return
     ann_vol     = std_ret  * (252 ** 0.5)  # annualised daily std
@@ -169,7 +176,7 @@ def compute_utility_score(
 
     # Sector preference boost (+20% if stock matches any preferred sector)
     if preferred_sectors:
-        stock_sector = STOCK_SECTOR_MAP.get(symbol, "")
+        stock_sector = (sector_map or STOCK_SECTOR_MAP).get(symbol, "")
         if stock_sector in preferred_sectors:
             score *= 1.20
 
@@ -181,7 +188,8 @@ def compute_utility_score(
 # ---------------------------------------------------------------------------
 
 class PortfolioRecommender:
-    def __init__(self, config):
+    def __init__(self, config, sector_map=None):
+        """sector_map: extra {symbol: sector} entries, layered over STOCK_SECTOR_MAP."""
         self.config         = config
         self.logger         = logging.getLogger(__name__)
         self.model_path     = os.path.join(self.config.models_dir, "recommender_model.keras")
@@ -190,6 +198,10 @@ class PortfolioRecommender:
         self.label_encoders = {}
         self.scaler         = StandardScaler()
         self.model          = None
+        if sector_map is None and getattr(config, "data_provider", None) == "synthetic":
+            # Synthetic symbols carry the sectors SyntheticProvider generated them with
+            sector_map = synthetic_sector_map(config.selected_stocks, config.synthetic_sectors)
+        self.sector_map     = {**STOCK_SECTOR_MAP, **(sector_map or {})}
 
     # ------------------------------------------------------------------
     # Encoding
@@ -280,49 +292,93 @@ class PortfolioRecommender:
     # Training data preparation — USER-AWARE labels
     # ------------------------------------------------------------------
 
+    @staticmethod
+    def _preferred_sectors(sectors):
+        """A profile's sectors field as used for the utility label (JSON strings are parsed)."""
+        if isinstance(sectors, str):
+            try:
+                return json.loads(sectors)
+            except Exception:
+                return []
+        return sectors
+
+    @staticmethod
+    def _stock_stats(stock_data: dict):
+        """(symbols, mean daily return, std + 1e-9) of every stock without NaN returns."""
+        symbols, means, stds = [], [], []
+        for symbol, data in stock_data.items():
+            if data["Return"].isna().any():
+                continue
+            symbols.append(symbol)
+            means.append(float(data["Return"].mean()))
+            stds.append(float(data["Return"].std()) + 1e-9)
+        return symbols, np.array(means, dtype=np.float64), np.array(stds, dtype=np.float64)
+
     def prepare_data(self, stock_data: dict, user_profiles: pd.DataFrame):
         """
         Build (X, y) where y is a USER-SPECIFIC utility score.
         Each (user, stock) pair gets a different label depending on that
         user's risk tolerance, goal, and sector preferences.
-        """
-        X, y = [], []
-
-        for _, user in user_profiles.iterrows():
-            df_user       = self._encode(pd.DataFrame([user]), fit_scaler=False)
-            user_features = df_user.values.flatten().tolist()
-
-            risk_tol  = str(user.get("riskTolerance", "moderate"))
-            goal      = str(user.get("primaryGoal", "growth"))
-            sectors   = user.get("sectors", [])
-            if isinstance(sectors, str):
-                try:
-                    sectors = json.loads(sectors)
-                except Exception:
-                    sectors = []
-
-            for symbol, data in stock_data.items():
-                if data["Return"].isna().any():
-                    continue
-
-                mean_ret = float(data["Return"].mean())
-                std_ret  = float(data["Return"].std()) + 1e-9
-
-                # ── USER-AWARE label ────────────────────────────────────
-                score = compute_utility_score(
-                    mean_ret, std_ret, symbol,
-                    risk_tol, goal, sectors
-                )
-                X.append(user_features + [mean_ret, std_ret])
-                y.append(score)
 
-        return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
+        Vectorized: all profiles are encoded in one _encode call and
+        broadcast against the per-stock statistics; labels are
+        compute_utility_score as array math, in the same operation order,
+        so X and y match the row-by-row construction exactly (rows ordered
+        by profile, then stock).
+        """
+        symbols, mean_ret, std_ret = self._stock_stats(stock_data)
+        n_users = len(user_profiles)
+        if n_users == 0 or not symbols:
+            return np.array([], dtype=np.float32), np.array([], dtype=np.float32)
+
+        user_features = self._encode(user_profiles.reset_index(drop=True), fit_scaler=False)
+        user_features = user_features.to_numpy(dtype=np.float64)
+
+        def column(name, default):
+            if name in user_profiles.columns:
+                return user_profiles[name].astype(str)
+            return pd.Series([default] * n_users)
+
+        goal   = column("primaryGoal", "growth")
+        risk   = column("riskTolerance", "moderate").map(RISK_PENALTY).fillna(1.5).to_numpy(np.float64)
+        ret_w  = goal.map({g: w[0] for g, w in GOAL_WEIGHTS.items()}).fillna(1.0).to_numpy(np.float64)
+        stab_w = goal.map({g: w[1] for g, w in GOAL_WEIGHTS.items()}).fillna(1.0).to_numpy(np.float64)
+
+        # ── USER-AWARE labels: compute_utility_score for every (user, stock) ──
+        ann_return = mean_ret * 252
+        ann_vol    = std_ret  * (252 ** 0.5)
+        sharpe     = ann_return / (ann_vol + 1e-9)
+        penalty    = risk[:, np.newaxis] * ann_vol
+        score      = ret_w[:, np.newaxis] * sharpe - stab_w[:, np.newaxis] * penalty
+
+        # Sector preference boost: stocks in any preferred sector of the user
+        if "sectors" in user_profiles.columns:
+            preferred = user_profiles["sectors"].reset_index(drop=True).map(self._preferred_sectors)
+            preferred = preferred.map(lambda p: p if p else [])
+            exploded  = preferred.explode()
+            stock_sec = [self.sector_map.get(s, "") for s in symbols]
+            boost     = np.zeros(score.shape, dtype=bool)
+            for sector in set(stock_sec):
+                users = exploded.index[(exploded == sector).to_numpy()].unique().to_numpy()
+                cols  = [j for j, sec in enumerate(stock_sec) if sec == sector]
+                boost[np.ix_(users, cols)] = True
+            score = np.where(boost, score * 1.20, score)
+
+        n_stocks = len(symbols)
+        X = np.hstack([
+            np.repeat(user_features, n_stocks, axis=0),
+            np.tile(np.column_stack([mean_ret, std_ret]), (n_users, 1)),
+        ])
+        return X.astype(np.float32), score.reshape(-1).astype(np.float32)
 
     # ------------------------------------------------------------------
     # Model — deeper network to capture preference interactions
     # ------------------------------------------------------------------
 
     def build_model(self, input_dim: int):
+        from tensorflow.keras.layers import Dense, Dropout, Input, BatchNormalization
+        from tensorflow.keras.models import Sequential
+
         model = Sequential([
             Input(shape=(input_dim,)),
             Dense(256, activation="relu"),
@@ -373,6 +429,8 @@ class PortfolioRecommender:
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
+        from tensorflow.keras.callbacks import EarlyStopping
+
         self.model = self.build_model(X_train.shape[1])
         es = EarlyStopping(monitor="val_loss", patience=8, restore_best_weights=True)
         self.model.fit(
@@ -391,6 +449,8 @@ class PortfolioRecommender:
     def load(self) -> None:
         if not os.path.exists(self.model_path):
             raise FileNotFoundError("Recommender model not found.")
+        from tensorflow.keras.models import load_model
+
         self.model          = load_model(self.model_path)
         self.label_encoders = joblib.load(self.encoder_path)
         self.scaler         = joblib.load(self.scaler_path)
@@ -463,13 +523,13 @@ class PortfolioRecommender:
 
             # Confidence: higher model score + sector match = higher confidence
             base_conf    = 50 + (shifted_score / (max(s for _, s, _, _ in shifted) + 1e-9)) * 40
-            sector_bonus = 5 if STOCK_SECTOR_MAP.get(symbol, "") in sectors else 0
+            sector_bonus = 5 if self.sector_map.get(symbol, "") in sectors else 0
             confidence   = min(99, round(base_conf + sector_bonus, 1))
 
             # Reasoning
-            sector_str = STOCK_SECTOR_MAP.get(symbol, "NSE")
+            sector_str = self.sector_map.get(symbol, "NSE")
             reasons = []
-            if STOCK_SECTOR_MAP.get(symbol, "") in sectors:
+            if self.sector_map.get(symbol, "") in sectors:
                 reasons.append(f"matches your preferred {sector_str} sector")
             if risk_tol == "conservative" and ann_vol_pct < 20:
                 reasons.append("low volatility suits conservative profile")
@@ -0,0 +1,137 @@
+"""
+scaler_store.py
+---------------
+All per-symbol feature scalers in one array file, replacing the
+{SYMBOL}_scaler.pkl pickles.
+
+scalers_dir/scalers.npz holds
+    symbols  (S,)     symbol names
+    min      (S, F)   MinMaxScaler.min_   per symbol
+    scale    (S, F)   MinMaxScaler.scale_ per symbol
+
+and is read once per change of the file. A fitted MinMaxScaler is fully
+described by those two vectors: transform(X) = X * scale + min. Loaded
+scalers are AffineScaler objects that apply exactly that (in the same
+in-place float32 arithmetic as sklearn), so LSTMModelTrainer can use them
+wherever it used a MinMaxScaler for transforming. Symbols not yet in the
+file fall back to their legacy pickle.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+
+class AffineScaler:
+    """Transform-only MinMaxScaler: transform(X) = X * scale_ + min_."""
+
+    def __init__(self, min_, scale_):
+        self.min_   = np.asarray(min_, dtype=np.float64)
+        self.scale_ = np.asarray(scale_, dtype=np.float64)
+
+    @property
+    def n_features_in_(self):
+        return len(self.scale_)
+
+    @staticmethod
+    def _copy(X):
+        X = np.array(X, copy=True)
+        return X if X.dtype in (np.float32, np.float64) else X.astype(np.float64)
+
+    def transform(self, X):
+        X  = self._copy(X)
+        X *= self.scale_
+        X += self.min_
+        return X
+
+    def inverse_transform(self, X):
+        X  = self._copy(X)
+        X -= self.min_
+        X /= self.scale_
+        return X
+
+
+class ScalerStore:
+    def __init__(self, scalers_dir):
+        self.root   = Path(scalers_dir)
+        self.path   = self.root / "scalers.npz"
+        self.logger = logging.getLogger(__name__)
+        self._lock  = threading.Lock()
+        self._stamp = None
+        self._rows  = {}   # symbol → (AffineScaler, row digest)
+
+    def _legacy_path(self, symbol):
+        return self.root / f"{symbol}_scaler.pkl"
+
+    def _refresh(self):
+        """(Re)reads scalers.npz if it changed since the last read."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._stamp, self._rows = None, {}
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        with np.load(self.path) as f:
+            symbols, mins, scales = f["symbols"], f["min"], f["scale"]
+        self._rows = {
+            str(s): (AffineScaler(m, sc), hashlib.sha1(m.tobytes() + sc.tobytes()).hexdigest()[:12])
+            for s, m, sc in zip(symbols, mins, scales)
+        }
+        self._stamp = stamp
+
+    def get(self, symbol):
+        """Scaler of symbol, or None when neither the store nor a legacy pickle has it."""
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(symbol)
+        if row is not None:
+            return row[0]
+        legacy = self._legacy_path(symbol)
+        if legacy.exists():
+            fitted = joblib.load(legacy)
+            return AffineScaler(fitted.min_, fitted.scale_)
+        return None
+
+    def version(self, symbol):
+        """Digest of symbol's scaler parameters; raises FileNotFoundError if it has none."""
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(symbol)
+        if row is not None:
+            return row[1]
+        legacy = self._legacy_path(symbol)
+        st     = os.stat(legacy)   # FileNotFoundError when there is no scaler at all
+        return f"pkl:{st.st_mtime_ns}:{st.st_size}"
+
+    def has(self, symbol):
+        try:
+            self.version(symbol)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_many(self, scalers):
+        """Adds or replaces {symbol: fitted scaler} rows in one atomic rewrite."""
+        if not scalers:
+            return
+        with self._lock:
+            self._refresh()
+            merged = {s: row[0] for s, row in self._rows.items()}
+            merged.update(scalers)
+            symbols = sorted(merged)
+            tmp = self.path.with_name("scalers.tmp.npz")
+            np.savez(
+                tmp,
+                symbols=np.array(symbols),
+                min=np.stack([np.asarray(merged[s].min_, dtype=np.float64) for s in symbols]),
+                scale=np.stack([np.asarray(merged[s].scale_, dtype=np.float64) for s in symbols]),
+            )
+            os.replace(tmp, self.path)
+            self._stamp = None
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from MLmodel.backtest import WalkForwardBacktester
+from MLmodel.config import Config
+
+
+class _WindowTrainer:
+    """prepare_data stand-in whose targets are the row numbers they forecast."""
+
+    def __init__(self, config):
+        self.config = config
+
+    def prepare_data(self, df, symbol=None):
+        lw, pd_ = self.config.lookback_window, self.config.prediction_days
+        n = len(df) - lw - pd_ + 1
+        X = np.arange(n, dtype=np.float32)[:, None, None] * np.ones((1, lw, 1), np.float32)
+        y = np.arange(n)[:, None] + lw + np.arange(pd_)
+        return X, y
+
+
+@pytest.mark.parametrize('prediction_days, stride', [(1, 1), (5, 1), (5, 3), (10, 7)])
+def test_test_windows_purge_training_targets(prediction_days, stride):
+    config = Config()
+    config.prediction_days, config.backtest_stride = prediction_days, stride
+    trainer = _WindowTrainer(config)
+    tester  = WalkForwardBacktester(config, trainer=trainer, registry=object())
+    df      = np.zeros(400)
+
+    X_all, y_all = trainer.prepare_data(df)
+    split        = int(len(X_all) * config.train_ratio)
+    X, y         = tester.test_windows(df, 'AAA')
+
+    # No held-out target day was also a training target, and none more than needed was dropped
+    assert y.min() == y_all[:split].max() + 1
+    assert int(X[0, 0, 0]) == split + prediction_days - 1
+    np.testing.assert_array_equal(X[:, 0, 0], np.arange(split + prediction_days - 1, len(X_all), stride))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from MLmodel import benchmark
+from MLmodel.config import Config
+
+
+def test_measure_reports_percentiles_and_throughput():
+    calls = []
+    r = benchmark.measure(lambda: calls.append(np.zeros(1000)), repeats=5, items=10, warmup=2)
+    assert len(calls) == 2 + 5 + 1   # warmup, timed repeats, one traced call
+    assert r['repeats'] == 5
+    assert 0 <= r['p50_ms'] <= r['p95_ms'] <= r['p99_ms']
+    assert r['items_per_s'] > 0 and r['peak_memory_kb'] > 0
+
+
+def test_fixtures_are_deterministic():
+    config = Config()
+    X, y   = benchmark.synthetic_windows(config, 8)
+    assert X.shape == (8, config.lookback_window, benchmark.NUM_FEATURES) and X.dtype == np.float32
+    assert y.shape == (8, config.prediction_days)
+    np.testing.assert_array_equal(X, benchmark.synthetic_windows(config, 8)[0])
+    assert benchmark.synthetic_profiles(20).equals(benchmark.synthetic_profiles(20))
+
+    sectors, raw = benchmark.synthetic_universe(config, 3)
+    assert list(raw) == list(sectors) and len(raw) == 3
+    again = benchmark.synthetic_universe(config, 3)[1]
+    assert all(raw[s].equals(again[s]) for s in raw)
+
+
+def test_compare_prints_p50_change(capsys):
+    previous = {'commit': 'abc1234', 'created': '2025-01-01T12:00:00',
+                'hot_paths': {'predict_batch': {'p50_ms': 10.0}}}
+    report   = {'hot_paths': {'predict_batch': {'p50_ms': 12.5}, 'recommend': {'p50_ms': 1.0}}}
+    benchmark.compare(report, previous)
+    out = capsys.readouterr().out
+    assert 'abc1234' in out and '+25.0%' in out and 'recommend' not in out
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from MLmodel.config import Config
+from MLmodel.data_collector import StockDataCollector
+from MLmodel.data_providers import DataProvider
+from MLmodel.tests.test_feature_engine import _bars
+
+
+class _History(DataProvider):
+    """Serves a fixed adjusted history and records the start of every fetch."""
+
+    def __init__(self, bars):
+        self.bars   = bars
+        self.starts = []
+
+    def fetch(self, symbol, start=None):
+        self.starts.append(start)
+        bars = self.bars if start is None else self.bars[self.bars['Date'] >= start]
+        return bars.reset_index(drop=True)
+
+
+def _collector(tmp_path, history):
+    config = Config()
+    config.raw_dir = str(tmp_path)
+    return StockDataCollector(config, provider=_History(history))
+
+
+def test_refresh_refetches_overlap_and_appends(tmp_path):
+    history   = _bars(0, days=120, start=pd.Timestamp.today().normalize() - pd.offsets.BDay(120))
+    collector = _collector(tmp_path, history)
+    collector.save_raw('AAA', history.iloc[:100])
+
+    bars = collector.refresh_raw('AAA')
+    overlap = collector.config.raw_refresh_overlap
+    assert collector.provider.starts == [history['Date'].iloc[100 - overlap]]
+    pd.testing.assert_frame_equal(bars, history, check_dtype=False)
+
+
+def test_refresh_redownloads_rebased_history(tmp_path):
+    history   = _bars(0, days=120, start=pd.Timestamp.today().normalize() - pd.offsets.BDay(120))
+    collector = _collector(tmp_path, history)
+    collector.save_raw('AAA', history.iloc[:100])
+    # A 2:1 split after the cache was written halves every adjusted price
+    rebased = history.copy()
+    rebased[['Open', 'High', 'Low', 'Close']] /= 2
+    collector.provider.bars = rebased
+
+    bars = collector.refresh_raw('AAA')
+    assert collector.provider.starts[-1] is None
+    pd.testing.assert_frame_equal(bars, rebased, check_dtype=False)
+    pd.testing.assert_frame_equal(collector.load_raw('AAA'), rebased, check_dtype=False)
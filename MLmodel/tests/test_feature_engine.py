@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from MLmodel.data_collector import StockDataCollector
+from MLmodel.feature_engine import FEATURES, PANEL_FIELDS, IncrementalFeatureEngine, compute_panel
+
+
+def _bars(seed, days=300, start="2022-01-03"):
+    rng   = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(days)))
+    return pd.DataFrame({
+        'Date':   pd.bdate_range(start, periods=days),
+        'Open':   close * (1 + 0.002 * rng.standard_normal(days)),
+        'High':   close * 1.01,
+        'Low':    close * 0.99,
+        'Close':  close,
+        'Volume': rng.integers(10_000, 1_000_000, days).astype(float),
+    })
+
+
+def _assert_matches(panel, symbol, raw):
+    expected = StockDataCollector.compute_features(raw).reset_index(drop=True)
+    actual   = panel.frame(symbol)
+    assert len(actual) == len(expected)
+    assert (actual['Date'].to_numpy() == expected['Date'].to_numpy()).all()
+    np.testing.assert_allclose(actual[PANEL_FIELDS].to_numpy(np.float64),
+                               expected[PANEL_FIELDS].to_numpy(np.float64).astype(np.float32),
+                               rtol=1e-4, atol=1e-6)
+
+
+def test_panel_matches_compute_features():
+    frames = {'AAA': _bars(0), 'BBB': _bars(1, days=250, start="2022-03-01")}
+    panel  = compute_panel(frames)
+    for symbol, raw in frames.items():
+        _assert_matches(panel, symbol, raw)
+
+
+@pytest.mark.parametrize('gap', [[60], [100, 101, 102], [150, 220]])
+def test_panel_matches_compute_features_across_gaps(gap):
+    # BBB misses days AAA traded: its indicators must still step from its own previous bar
+    frames = {'AAA': _bars(0), 'BBB': _bars(1).drop(index=gap).reset_index(drop=True)}
+    panel  = compute_panel(frames)
+    for symbol, raw in frames.items():
+        _assert_matches(panel, symbol, raw)
+    missing = ~np.isin(panel.dates, frames['BBB']['Date'].to_numpy())
+    assert not panel.valid[panel.symbols.index('BBB'), missing].any()
+
+
+def test_incremental_engine_matches_compute_features():
+    raw      = _bars(2)
+    expected = StockDataCollector.compute_features(raw).reset_index(drop=True)
+    engine   = IncrementalFeatureEngine()
+    rows     = [engine.update(*bar) for bar in raw[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+                .itertuples(index=False)]
+    actual   = pd.DataFrame([r for r in rows if r is not None])
+    assert (actual['Date'].to_numpy() == expected['Date'].to_numpy()).all()
+    np.testing.assert_allclose(actual[FEATURES].to_numpy(np.float64),
+                               expected[FEATURES].to_numpy(np.float64), rtol=1e-7, atol=1e-9)
+    assert engine.n == len(raw) and engine.last_date == raw['Date'].iloc[-1]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from MLmodel.forecast_store import ForecastStore
+
+
+class _Registry:
+    def __init__(self, versions):
+        self.versions = versions
+        self.loaded   = []
+
+    def version(self, symbol):
+        return self.versions[symbol]
+
+    def get(self, symbol):
+        self.loaded.append(symbol)
+        return symbol
+
+
+class _Trainer:
+    """Forecasts a constant per symbol and records what it was asked to predict."""
+
+    def __init__(self):
+        self.predicted = []
+
+    def prepare_last_window(self, df, symbol):
+        return np.zeros((1, 5, 1), np.float32)
+
+    def predict_batch(self, models, windows):
+        self.predicted.append(sorted(windows))
+        return {s: np.full(3, len(s), np.float32) for s in windows}
+
+    def inverse_transform_close_many(self, symbols, scaled):
+        return np.asarray(scaled) * 10
+
+
+def test_precompute_skips_current_forecasts(tmp_path):
+    store    = ForecastStore(str(tmp_path / 'forecasts.db'))
+    data     = {s: pd.DataFrame({'Date': pd.bdate_range('2025-01-01', periods=3)}) for s in ('A', 'BB')}
+    versions = {'A': 'd1', 'BB': 'd1'}
+    registry = _Registry({'A': 'm1', 'BB': 'm1'})
+    trainer  = _Trainer()
+
+    assert store.precompute(trainer, registry, data, versions) == ['A', 'BB']
+    assert store.precompute(trainer, registry, data, versions) == []   # nothing changed: no inference
+    assert trainer.predicted == [['A', 'BB'], []] and registry.loaded == ['A', 'BB']
+
+    registry.versions['BB'] = 'm2'                                      # BB retrained
+    versions = {**versions, 'A': 'd2'}                                  # A got a new bar
+    data['C'] = data['A']                                               # C has no data version
+    assert sorted(store.precompute(trainer, registry, data, versions)) == ['A', 'BB']
+    assert store.get('A', 'd2', 'm1') == [10.0] * 3 and store.get('BB', 'd1', 'm2') == [20.0] * 3
+    assert store.stored_versions() == {'A': ('d2', 'm1'), 'BB': ('d1', 'm2')}
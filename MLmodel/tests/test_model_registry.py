@@ -0,0 +1,34 @@
+import keras
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from MLmodel.model_registry import ModelRegistry
+from MLmodel.tests.test_serving_path import _trainer
+
+
+def _train(trainer, symbol, lookback, seed):
+    """Stands in for a training run: saves a model, its scaler and its metadata."""
+    inputs = keras.Input((lookback, 22))
+    keras.Model(inputs, keras.layers.Dense(3)(keras.layers.Flatten()(inputs))).save(trainer.model_path(symbol))
+    rows = np.random.default_rng(seed).random((50, 22))
+    trainer.scaler_store.put_many({symbol: MinMaxScaler().fit(rows)})
+    trainer.save_training_meta(symbol, {'lookback_window': lookback})
+
+
+def test_hold_serves_the_loaded_pair_until_released(tmp_path):
+    trainer = _trainer(tmp_path)
+    trainer.config.serving_runtime = 'keras'
+    registry = ModelRegistry(trainer, capacity=4)
+    _train(trainer, 'AAA', lookback=5, seed=1)
+    served, version = registry.get('AAA'), registry.version('AAA')
+    scaler = trainer.scalers['AAA']
+
+    with registry.hold():
+        _train(trainer, 'AAA', lookback=7, seed=2)   # a run rewrites model, scaler and metadata
+        assert registry.get('AAA') is served and registry.version('AAA') == version
+        assert trainer.scalers['AAA'] is scaler and trainer.lookback_window('AAA') == 5
+
+    fresh = registry.get('AAA')
+    assert fresh is not served and fresh.inputs[0].shape[1] == 7
+    assert registry.version('AAA') != version and trainer.scalers['AAA'] is not scaler
+    assert trainer.lookback_window('AAA') == 7
@@ -0,0 +1,47 @@
+import joblib
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from MLmodel.scaler_store import AffineScaler, ScalerStore
+
+
+def _fitted(seed, features=22):
+    rng = np.random.default_rng(seed)
+    return MinMaxScaler().fit(rng.normal(100, 25, (500, features)).astype(np.float32))
+
+
+def test_affine_scaler_matches_minmax_scaler():
+    fitted = _fitted(0)
+    affine = AffineScaler(fitted.min_, fitted.scale_)
+    X      = np.random.default_rng(1).normal(100, 30, (64, 22))
+    for dtype in (np.float32, np.float64):
+        scaled = affine.transform(X.astype(dtype))
+        assert scaled.dtype == dtype
+        np.testing.assert_array_equal(scaled, fitted.transform(X.astype(dtype)))
+        np.testing.assert_allclose(affine.inverse_transform(scaled), X.astype(dtype),
+                                   rtol=1e-5 if dtype == np.float32 else 1e-12)
+    assert affine.n_features_in_ == fitted.n_features_in_
+
+
+def test_store_round_trip(tmp_path):
+    store = ScalerStore(tmp_path)
+    store.put_many({'AAA': _fitted(0), 'BBB': _fitted(1)})
+    X = np.random.default_rng(2).normal(100, 30, (16, 22)).astype(np.float32)
+    for symbol, seed in (('AAA', 0), ('BBB', 1)):
+        np.testing.assert_array_equal(ScalerStore(tmp_path).get(symbol).transform(X),
+                                      _fitted(seed).transform(X))
+
+    version = store.version('AAA')
+    store.put_many({'AAA': _fitted(3)})
+    assert store.version('AAA') != version
+    assert store.version('BBB') == ScalerStore(tmp_path).version('BBB')
+    np.testing.assert_array_equal(store.get('AAA').transform(X), _fitted(3).transform(X))
+
+
+def test_store_falls_back_to_legacy_pickle(tmp_path):
+    store = ScalerStore(tmp_path)
+    assert store.get('AAA') is None and not store.has('AAA')
+    joblib.dump(_fitted(0), tmp_path / 'AAA_scaler.pkl')
+    X = np.random.default_rng(2).normal(100, 30, (16, 22)).astype(np.float32)
+    np.testing.assert_array_equal(store.get('AAA').transform(X), _fitted(0).transform(X))
+    assert store.version('AAA').startswith('pkl:')
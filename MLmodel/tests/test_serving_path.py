@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from MLmodel.config import Config
+from MLmodel.lstm_model import LSTMModelTrainer
+
+
+def _trainer(tmp_path):
+    config = Config()
+    config.models_dir  = str(tmp_path / 'models')
+    config.scalers_dir = str(tmp_path / 'scalers')
+    os.makedirs(config.models_dir)
+    os.makedirs(config.scalers_dir)
+    config.serving_runtime = 'tflite'
+    return LSTMModelTrainer(config)
+
+
+def _train(trainer, symbol, seed, path=None):
+    """Stands in for a training run: rewrites the model file and the scaler."""
+    path = path or trainer.model_path(symbol)
+    with open(path, 'wb') as f:
+        f.write(bytes([seed]) * (100 + seed))
+    rows = np.random.default_rng(seed).random((50, 22))
+    trainer.scaler_store.put_many({symbol: MinMaxScaler().fit(rows)})
+    return path
+
+
+def _export(trainer, symbol, keras_path):
+    exported = trainer.tflite_path(keras_path, trainer.config.tflite_variant)
+    with open(exported, 'wb') as f:
+        f.write(b'tflite')
+    trainer.write_provenance(exported, keras_path, [symbol])
+    return exported
+
+
+def test_tflite_served_only_while_current(tmp_path):
+    trainer = _trainer(tmp_path)
+    keras_path = _train(trainer, 'AAA', 1)
+    assert trainer.serving_path('AAA') == keras_path   # not exported
+
+    exported = _export(trainer, 'AAA', keras_path)
+    assert trainer.serving_path('AAA') == exported
+
+    _train(trainer, 'AAA', 2)                           # retrained without export_tflite
+    assert trainer.serving_path('AAA') == keras_path
+    assert _export(trainer, 'AAA', keras_path) == trainer.serving_path('AAA')
+
+    os.remove(trainer.provenance_path(exported))        # export without a sidecar
+    assert trainer.serving_path('AAA') == keras_path
+
+
+def test_student_served_only_for_its_teacher(tmp_path):
+    trainer = _trainer(tmp_path)
+    trainer.config.serving_runtime, trainer.config.serving_model = 'keras', 'student'
+    teacher = _train(trainer, 'AAA', 1)
+    student = trainer.student_path('AAA')
+    with open(student, 'wb') as f:
+        f.write(b'student')
+    assert trainer.serving_path('AAA') == teacher         # no sidecar: not known to be current
+
+    trainer.write_provenance(student, teacher, ['AAA'])   # as Distiller.distill does
+    assert trainer.serving_path('AAA') == student
+
+    trainer.config.serving_runtime = 'tflite'
+    assert _export(trainer, 'AAA', student) == trainer.serving_path('AAA')
+
+    _train(trainer, 'AAA', 2)                             # teacher retrained, student not re-distilled
+    assert trainer.serving_path('AAA') == teacher
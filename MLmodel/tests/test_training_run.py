@@ -0,0 +1,34 @@
+from MLmodel.training_run import RunManifest
+
+
+def _interrupted(path):
+    manifest = RunManifest.open(path)
+    manifest.mark_done('AAA', {'mae': 1.0})
+    manifest.mark_skipped('BBB')
+    manifest.mark_failed('CCC', ValueError('no bars'))
+    return manifest
+
+
+def test_resume_continues_unfinished_run(tmp_path):
+    path  = str(tmp_path / 'training_run.json')
+    first = _interrupted(path)
+    assert not first.resumed
+
+    resumed = RunManifest.open(path, resume=True)
+    assert resumed.resumed
+    assert resumed.data['run_id'] == first.data['run_id']
+    assert resumed.done() == {'AAA': {'mae': 1.0}}
+    assert resumed.settled() == {'AAA', 'BBB'}
+    assert resumed.failed() == {'CCC': 'no bars'}
+
+
+def test_finished_or_fresh_run_starts_over(tmp_path):
+    path = str(tmp_path / 'training_run.json')
+    _interrupted(path)
+    fresh = RunManifest.open(path)
+    assert not fresh.resumed and fresh.data['symbols'] == {}
+
+    fresh.mark_done('AAA', {'mae': 1.0})
+    fresh.finish()
+    after = RunManifest.open(path, resume=True)
+    assert not after.resumed and after.done() == {}
@@ -0,0 +1,88 @@
+"""
+training_run.py
+---------------
+Manifest of a train_all_models run, so an interrupted run can be resumed.
+
+models_dir/training_run.json records, per symbol, whether it finished
+("done", with its metrics) or failed (with the error), and whether the run
+as a whole completed. train_all_models(..., resume=True) reopens an
+unfinished manifest and skips symbols already done (failed symbols are
+retried, and a run with failures never counts as finished); the symbol that
+was in progress continues from its last per-epoch checkpoint (BackupAndRestore
+under models_dir/checkpoints/).
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+
+class RunManifest:
+    def __init__(self, path, data):
+        self.path    = path
+        self.data    = data
+        self.resumed = False   # True when open() continued an unfinished run
+        self.logger  = logging.getLogger(__name__)
+        self._lock   = threading.Lock()
+
+    @classmethod
+    def open(cls, path, resume=False):
+        """The unfinished run at path when resuming, else a new run (replacing any old manifest)."""
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if not data.get("finished"):
+                manifest = cls(path, data)
+                manifest.resumed = True
+                print(f"Resuming training run {data['run_id']}: "
+                      f"{len(manifest.done())} symbols already done.")
+                return manifest
+        manifest = cls(path, {
+            "run_id":   datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "started":  datetime.now().isoformat(timespec="seconds"),
+            "finished": None,
+            "symbols":  {},
+        })
+        manifest._save()
+        return manifest
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def done(self):
+        """{symbol: metrics} of every symbol finished in this run."""
+        return {s: e["metrics"] for s, e in self.data["symbols"].items() if e["status"] == "done"}
+
+    def settled(self):
+        """Symbols that need no more work in this run: done, or skipped for too little data."""
+        return {s for s, e in self.data["symbols"].items() if e["status"] in ("done", "skipped")}
+
+    def failed(self):
+        """{symbol: error message} of every symbol that failed in this run."""
+        return {s: e["error"] for s, e in self.data["symbols"].items() if e["status"] == "failed"}
+
+    def _mark(self, symbol, entry):
+        entry["at"] = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self.data["symbols"][symbol] = entry
+            self._save()
+
+    def mark_done(self, symbol, metrics):
+        self._mark(symbol, {"status": "done", "metrics": metrics})
+
+    def mark_skipped(self, symbol):
+        self._mark(symbol, {"status": "skipped"})
+
+    def mark_failed(self, symbol, error):
+        self.logger.error("Training %s failed: %s", symbol, error)
+        self._mark(symbol, {"status": "failed", "error": str(error)})
+
+    def finish(self):
+        with self._lock:
+            self.data["finished"] = datetime.now().isoformat(timespec="seconds")
+            self._save()